@@ -3,7 +3,7 @@ import functools
 import importlib
 import pkgutil
 import typing
-from bbblb.services import bootstrap
+from bbblb.services import ServiceRegistry, bootstrap
 from bbblb.settings import ConfigError, BBBLBConfig
 import click
 import os
@@ -12,13 +12,24 @@ import json
 
 
 def async_command():
-    """Decorator that wraps coroutine with asyncio.run and click.pass_obj."""
+    """Decorator that wraps coroutine with asyncio.run and click.pass_obj.
+
+    Services started by the command are shut down before the event loop
+    is closed, otherwise lingering threads (e.g. aiosqlite connections)
+    keep the process alive."""
 
     def decorator(func):
+        async def run_and_shutdown(obj, *args, **kwargs):
+            try:
+                return await func(obj, *args, **kwargs)
+            finally:
+                if isinstance(obj, ServiceRegistry):
+                    await obj.shutdown()
+
         @functools.wraps(func)
         @click.pass_obj
         def sync_wrapper(*args, **kwargs):
-            return asyncio.run(func(*args, **kwargs))
+            return asyncio.run(run_and_shutdown(*args, **kwargs))
 
         return sync_wrapper
 
@@ -83,13 +94,17 @@ class Table:
         self._rows.append([values.get(column, None) for column in self._headers])
 
     def print(self, format="simple"):
+        # Line based formats are joined and printed with a single echo
         if format == "json":
             keys = list(self._headers)
-            for row in self._rows:
-                click.echo(json.dumps(dict(zip(keys, row))))
+            encode = json.JSONEncoder().encode
+            lines = [encode(dict(zip(keys, row))) for row in self._rows]
+            if lines:
+                click.echo("\n".join(lines))
         elif format == "raw":
-            for row in self._rows:
-                click.echo("\t".join(map(str, row)))
+            lines = ["\t".join(map(str, row)) for row in self._rows]
+            if lines:
+                click.echo("\n".join(lines))
         else:
             click.echo(
                 tabulate.tabulate(
@@ -15,11 +15,19 @@ def db():
 @click.option(
     "--create", help="Create database if needed (only postgres).", is_flag=True
 )
+@click.option(
+    "--sql",
+    help="Print SQL statements instead of running them (offline mode).",
+    is_flag=True,
+)
 @async_command()
-async def migrate(obj: ServiceRegistry, create: bool):
+async def migrate(obj: ServiceRegistry, create: bool, sql: bool):
     """
     Migrate database to the current schema version.
 
+    Use --sql to review or apply migrations out of band, e.g. for rolling
+    deployments with BBBLB_DB_MIGRATE=false.
+
     WARNING: Make backups!
     """
     config = await obj.use(BBBLBConfig)
@@ -28,7 +36,9 @@ async def migrate(obj: ServiceRegistry, create: bool):
         if create:
             await create_database(config.DB)
         current, target = await check_migration_state(config.DB)
-        if current != target:
+        if sql:
+            await migrate_db(config.DB, sql=True, start=current)
+        elif current != target:
             click.echo(
                 f"Migrating database schema from {current or 'empty'!r} to {target!r}..."
             )
@@ -1,4 +1,6 @@
+import asyncio
 import re
+import typing
 from bbblb import model
 from bbblb.services import ServiceRegistry
 from bbblb.services.db import DBContext
@@ -16,6 +18,9 @@ def override():
 type_choices = MultiChoice(["create", "join"])
 type_choice = click.Choice(type_choices.choices)
 
+# Split NAME=VALUE pairs at the first operator
+RE_OVERRIDE_SPLIT = re.compile(f"([{re.escape(''.join(model.OPERATOR__ALL))}])")
+
 
 @override.command("list")
 @click.argument("tenant", required=False)
@@ -33,7 +38,7 @@ async def override_list(obj: ServiceRegistry, tenant: str, type: list[str]):
     async with db.session() as session:
         if tenant:
             stmt = model.TenantOverride.select(
-                model.TenantOverride.tenant.name == tenant
+                model.TenantOverride.tenant.has(name=tenant)
             )
         else:
             stmt = model.TenantOverride.select()
@@ -52,12 +57,22 @@ async def override_list(obj: ServiceRegistry, tenant: str, type: list[str]):
     help="Remove all overrides for that tenant and type before adding new ones.",
     is_flag=True,
 )
+@click.option(
+    "--from-file",
+    help="Read additional NAME=VALUE pairs (one per line) from a file, or '-' for stdin.",
+    type=click.File("r"),
+)
 @click.argument("tenant")
 @click.argument("type", type=type_choice)
 @click.argument("overrides", nargs=-1, metavar="NAME=VALUE")
 @async_command()
 async def override_set(
-    obj: ServiceRegistry, clear: bool, tenant: str, type: str, overrides: list[str]
+    obj: ServiceRegistry,
+    clear: bool,
+    from_file: typing.TextIO | None,
+    tenant: str,
+    type: str,
+    overrides: tuple[str, ...],
 ):
     """Override create or join call parameters for a given tenant.
 
@@ -72,7 +87,16 @@ async def override_set(
     define a maximum value for numeric parameters (e.g. duration
     or maxParticipants), or '+' to add items to a comma separated list
     parameter (e.g. disabledFeatures).
+
+    Large numbers of overrides can be applied in a single transaction
+    with --from-file. Empty lines and lines starting with '#' are ignored.
     """
+    if from_file:
+        lines = (await asyncio.to_thread(from_file.read)).splitlines()
+        overrides += tuple(
+            line for line in map(str.strip, lines) if line and line[0] != "#"
+        )
+
     db = await obj.use(DBContext)
     async with db.session() as session:
         db_tenant = (
@@ -92,20 +116,19 @@ async def override_set(
             click.echo("Set at least one override, see --help")
             raise SystemExit(1)
 
+        existing = {(o.type, o.param): o for o in db_tenant.overrides}
         for override in overrides:
-            split = re.split(r"([?=<+])", override, maxsplit=1)
+            split = RE_OVERRIDE_SPLIT.split(override, maxsplit=1)
             param, op, value = split if len(split) == 3 else (override, "=", "")
             if op not in model.OPERATOR__ALL:
                 raise ValueError(
                     f"Operator must be one of: {', '.join(model.OPERATOR__ALL)}"
                 )
-            to_update = next(
-                (o for o in db_tenant.overrides if o.type == type and o.param == param),
-                None,
-            )
+            to_update = existing.get((type, param))
             if not to_update:
                 to_update = model.TenantOverride(type=type, param=param)
                 db_tenant.overrides.append(to_update)
+                existing[(type, param)] = to_update
             to_update.op = op
             to_update.value = value
 
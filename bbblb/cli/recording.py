@@ -25,11 +25,15 @@ async def _list(obj: ServiceRegistry):
     """List all recordings and their formats"""
     db = await obj.use(DBContext)
     async with db.session() as session, session.begin():
-        stmt = model.Recording.select().options(
-            sqlalchemy.orm.joinedload(model.Recording.tenant),
-            sqlalchemy.orm.selectinload(model.Recording.formats),
+        stmt = (
+            model.Recording.select()
+            .options(
+                sqlalchemy.orm.joinedload(model.Recording.tenant),
+                sqlalchemy.orm.selectinload(model.Recording.formats),
+            )
+            .execution_options(yield_per=500)
         )
-        for record in (await session.execute(stmt)).scalars():
+        async for record in await session.stream_scalars(stmt):
             click.echo(
                 f"{record.tenant.name} {record.record_id} {','.join(f.format for f in record.formats)}"
             )
@@ -106,8 +110,10 @@ async def _import(obj: ServiceRegistry, tenant: str, publish: bool | None, file:
     importer = await obj.use(RecordingManager)
 
     async def reader(file):
+        # Read in larger chunks and off the event loop, because the
+        # import task is running concurrently.
         with click.open_file(file, "rb") as fp:
-            while chunk := fp.read(1024 * 64):
+            while chunk := await asyncio.to_thread(fp.read, 1024 * 1024):
                 yield chunk
 
     task = await importer.start_import(reader(file), force_tenant=tenant)
@@ -147,12 +153,20 @@ async def remove_orphans(obj: ServiceRegistry, dry_run: bool):
     db = await obj.use(DBContext)
     importer = await obj.use(RecordingManager)
     async with db.session() as session, session.begin():
-        stmt = model.Recording.select().options(
-            sqlalchemy.orm.joinedload(model.Recording.tenant),
-            sqlalchemy.orm.selectinload(model.Recording.formats),
+        stmt = (
+            model.Recording.select()
+            .options(
+                sqlalchemy.orm.joinedload(model.Recording.tenant),
+                sqlalchemy.orm.selectinload(model.Recording.formats),
+            )
+            .execution_options(yield_per=500)
         )
-        records = await session.execute(stmt)
-        for record in records.scalars():
+
+        # Stream recordings in batches and only remember orphan IDs, so
+        # we do not have to keep all recordings in memory.
+        orphan_formats: list[int] = []
+        orphan_records: list[int] = []
+        async for record in await session.stream_scalars(stmt):
             populated = False
             for format in record.formats:
                 sdir = importer.get_storage_dir(
@@ -166,12 +180,22 @@ async def remove_orphans(obj: ServiceRegistry, dry_run: bool):
                 click.echo(
                     f"Deleting orphan format: {record.tenant.name}/{record.record_id}/{format.format}"
                 )
-                await session.delete(format)
+                orphan_formats.append(format.id)
             if not populated:
                 click.echo(
                     f"Deleting record without formats: {record.tenant.name}/{record.record_id}"
                 )
-                await session.delete(record)
+                orphan_records.append(record.id)
+
+        chunk_size = 500
+        for offset in range(0, len(orphan_formats), chunk_size):
+            chunk = orphan_formats[offset : offset + chunk_size]
+            await session.execute(
+                model.PlaybackFormat.delete(model.PlaybackFormat.id.in_(chunk))
+            )
+        for offset in range(0, len(orphan_records), chunk_size):
+            chunk = orphan_records[offset : offset + chunk_size]
+            await session.execute(model.Recording.delete(model.Recording.id.in_(chunk)))
 
         if dry_run:
             click.echo("Rolling back changes (dry run)")
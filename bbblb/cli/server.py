@@ -163,13 +163,13 @@ async def _delete(obj: ServiceRegistry, domain: str):
 
 async def _end_meeting(obj: ServiceRegistry, meeting: model.Meeting):
     server = await meeting.awaitable_attrs.server
-    tenant = await meeting.awaitable_attrs.server
+    tenant = await meeting.awaitable_attrs.tenant
     scoped_id = utils.add_scope(meeting.external_id, tenant.name)
-    bbb = (await obj.use(BBBHelper)).connect(meeting.server.api_base, server.secret)
+    bbb = (await obj.use(BBBHelper)).connect(server.api_base, server.secret)
 
     result = await bbb.action("end", {"meetingID": scoped_id})
     if result.success:
-        click.echo(f"Ended meeting {meeting.external_id} ({meeting.tenant.name})")
+        click.echo(f"Ended meeting {meeting.external_id} ({tenant.name})")
     else:
         click.echo(
             f"Failed to end meeting {meeting.external_id}: {result.messageKey} {result.message}"
@@ -35,6 +35,58 @@ def migrate_state(state):
     )
 
 
+def validate_state(state) -> list[str]:
+    """Check the structure of a (migrated) state document and return a list
+    of problems, so bad input is rejected before any rows are locked."""
+    if not isinstance(state, dict):
+        return ["State must be a JSON object"]
+
+    def check(path, conf, required, optional=()):
+        if not isinstance(conf, dict):
+            errors.append(f"{path}: Must be an object")
+            return
+        for key, vtype in required:
+            if not isinstance(conf.get(key), vtype):
+                errors.append(f"{path}.{key}: Missing or not a {vtype.__name__}")
+        for key, vtype in optional:
+            if key in conf and not isinstance(conf[key], vtype):
+                errors.append(f"{path}.{key}: Not a {vtype.__name__}")
+
+    errors: list[str] = []
+    for section in ("servers", "tenants"):
+        if not isinstance(state.get(section, {}), dict):
+            errors.append(f"{section}: Must be an object")
+    if errors:
+        return errors
+
+    for domain, conf in state.get("servers", {}).items():
+        check(f"servers.{domain}", conf, [("secret", str)], [("enabled", bool)])
+
+    for name, conf in state.get("tenants", {}).items():
+        path = f"tenants.{name}"
+        check(
+            path,
+            conf,
+            [("secret", str), ("realm", str)],
+            [("enabled", bool), ("overrides", dict)],
+        )
+        if not isinstance(conf, dict):
+            continue
+        for otype, overrides in conf.get("overrides", {}).items():
+            if otype not in ("create", "join") or not isinstance(overrides, dict):
+                errors.append(
+                    f"{path}.overrides.{otype}: Unknown type or not an object"
+                )
+                continue
+            for param, value in overrides.items():
+                if not value or not isinstance(value, str):
+                    errors.append(
+                        f"{path}.overrides.{otype}.{param}: Must be a non-empty string"
+                    )
+
+    return errors
+
+
 @state.command()
 @click.option(
     "--include",
@@ -54,23 +106,25 @@ async def export(obj: ServiceRegistry, types, file: str):
 
     async with db.session() as session:
         if "servers" in types:
-            export["servers"] = {}
             stmt = model.Server.select().order_by(model.Server.domain)
-            for server in (await session.execute(stmt)).scalars():
-                export["servers"][server.domain] = {
+            servers = (await session.execute(stmt)).scalars().all()
+            export["servers"] = {
+                server.domain: {
                     "secret": server.secret,
                     "enabled": server.enabled,
                 }
+                for server in servers
+            }
 
         if "tenants" in types:
-            export["tenants"] = {}
             stmt = (
                 model.Tenant.select()
                 .options(model.selectinload(model.Tenant.overrides))
                 .order_by(model.Tenant.name)
             )
-            for tenant in (await session.execute(stmt)).scalars():
-                export["tenants"][tenant.name] = {
+            tenants = (await session.execute(stmt)).scalars().all()
+            export["tenants"] = {
+                tenant.name: {
                     "secret": tenant.secret,
                     "realm": tenant.realm,
                     "enabled": tenant.enabled,
@@ -83,10 +137,14 @@ async def export(obj: ServiceRegistry, types, file: str):
                         for api in ("join", "create")
                     },
                 }
+                for tenant in tenants
+            }
 
+    # json.dump() writes each small encoder chunk separately. Encode in one
+    # go and write the result with a single call instead.
+    data = await asyncio.to_thread(json.dumps, export, indent=2)
     with click.open_file(file, "w") as fp:
-        await asyncio.to_thread(json.dump, export, fp, indent=2)
-        fp.write("\n")
+        await asyncio.to_thread(fp.write, data + "\n")
 
 
 @state.command("import")
@@ -135,10 +193,16 @@ async def import_(
 
     """
     db = await obj.use(DBContext)
-    with click.open_file(file, "r") as fp:
+    # Read raw bytes and let json detect the encoding, which skips the
+    # text decoding layer of text mode files and stdin.
+    with click.open_file(file, "rb") as fp:
         state = await asyncio.to_thread(json.load, fp)
 
     state = migrate_state(state)
+    if errors := validate_state(state):
+        for error in errors:
+            click.echo(f"Invalid state: {error}")
+        raise SystemExit(1)
 
     if dry_run:
         click.echo("=== DRY RUN ===")
@@ -177,6 +241,29 @@ async def import_(
             click.echo("=== DRY RUN ===")
 
 
+async def nuke_meetings(
+    sr: ServiceRegistry, meetings: list[model.Meeting], dry_run: bool, limit=16
+):
+    """End meetings concurrently, with at most `limit` requests in flight.
+    Server and tenant of each meeting should already be loaded, because the
+    requests share a single session."""
+    if not dry_run:
+        semaphore = asyncio.Semaphore(limit)
+
+        async def end(meeting: model.Meeting):
+            async with semaphore:
+                await _end_meeting(sr, meeting)
+
+        results = await asyncio.gather(
+            *(end(meeting) for meeting in meetings), return_exceptions=True
+        )
+        for error in results:
+            if isinstance(error, BaseException):
+                raise error
+    for meeting in meetings:
+        click.echo(f"{meeting} nuked")
+
+
 def logchange(obj, attr, value):
     oldval = getattr(obj, attr)
     if oldval == value:
@@ -194,8 +281,13 @@ async def sync_servers(
     nuke: bool,
     dry_run: bool,
 ):
-    cur = await session.execute(model.Server.select().with_for_update())
-    servers = {server.domain: server for server in cur.scalars()}
+    stmt = model.Server.select()
+    if not dry_run:
+        # Every server is either updated or obsolete, so lock them all.
+        # Dry runs never write and do not need to block other writers.
+        stmt = stmt.with_for_update()
+    cur = await session.execute(stmt)
+    servers = {server.domain: server for server in cur.scalars().all()}
     changed = False
 
     # Create or modify servers
@@ -210,24 +302,39 @@ async def sync_servers(
         changed |= logchange(server, "secret", server_conf["secret"])
 
     # Disable or remove obsolete servers
-    for obsolete in set(servers) - set(target):
-        server = servers[obsolete]
-        meetings = await server.awaitable_attrs.meetings
+    obsolete = [server for domain, server in servers.items() if domain not in target]
+    if obsolete:
+        # Load meetings for all obsolete servers with a single query
+        await session.execute(
+            model.Server.select(model.Server.id.in_([s.id for s in obsolete])).options(
+                model.selectinload(model.Server.meetings).joinedload(
+                    model.Meeting.tenant
+                )
+            )
+        )
+    remove = []
+    for server in obsolete:
+        meetings = server.meetings
         changed = True
 
         if nuke and meetings:
-            for meeting in meetings:
-                if not dry_run:
-                    await _end_meeting(sr, meeting)
-                click.echo(f"{meeting} nuked")
+            await nuke_meetings(sr, meetings, dry_run)
             meetings = []
 
         if delete and not meetings:
             click.echo(f"{server} removed")
-            await session.delete(server)
+            remove.append(server.id)
         else:
             changed |= logchange(server, "enabled", False)
 
+    # Remove servers (and their nuked meetings) with one DELETE per table
+    if remove:
+        for stmt in (
+            model.Meeting.delete(model.Meeting.server_fk.in_(remove)),
+            model.Server.delete(model.Server.id.in_(remove)),
+        ):
+            await session.execute(stmt.execution_options(synchronize_session=False))
+
     return changed
 
 
@@ -242,7 +349,7 @@ async def sync_tenants(
     cur = await session.execute(
         model.Tenant.select().options(model.selectinload(model.Tenant.overrides))
     )
-    tenants = {tenant.name: tenant for tenant in cur.scalars()}
+    tenants = {tenant.name: tenant for tenant in cur.scalars().all()}
     changed = False
 
     # Create or modify tenants
@@ -284,16 +391,22 @@ async def sync_tenants(
                 changed = True
 
     # Disable or remove obsolete tenants
-    for obsolete in set(tenants) - set(target):
-        tenant = tenants[obsolete]
-        meetings = await tenant.awaitable_attrs.meetings
+    obsolete = [tenant for name, tenant in tenants.items() if name not in target]
+    if obsolete:
+        # Load meetings for all obsolete tenants with a single query
+        await session.execute(
+            model.Tenant.select(model.Tenant.id.in_([t.id for t in obsolete])).options(
+                model.selectinload(model.Tenant.meetings).joinedload(
+                    model.Meeting.server
+                )
+            )
+        )
+    for tenant in obsolete:
+        meetings = tenant.meetings
         changed = True
 
         if nuke and meetings:
-            for meeting in meetings:
-                if not dry_run:
-                    await _end_meeting(sr, meeting)
-                click.echo(f"{meeting} nuked")
+            await nuke_meetings(sr, meetings, dry_run)
             meetings = []
 
         if tenant.enabled and delete and not meetings:
@@ -34,9 +34,7 @@ async def create(
     db = await obj.use(DBContext)
     cfg = await obj.use(BBBLBConfig)
     async with db.session() as session:
-        tenant = (
-            await session.execute(model.Tenant.select(name=name))
-        ).scalar_one_or_none()
+        tenant = await session.scalar(model.Tenant.select(name=name))
         if tenant and not update:
             raise RuntimeError(f"Tenant with name {name} already exists.")
         action = "UPDATED"
@@ -59,9 +57,7 @@ async def enable(obj: ServiceRegistry, name: str):
     """Enable a tenant"""
     db = await obj.use(DBContext)
     async with db.session() as session:
-        tenant = (
-            await session.execute(model.Tenant.select(name=name))
-        ).scalar_one_or_none()
+        tenant = await session.scalar(model.Tenant.select(name=name))
         if not tenant:
             click.echo(f"Tenant {name!r} not found")
             return
@@ -81,9 +77,7 @@ async def disable(obj: ServiceRegistry, name: str, nuke: bool):
     """Disable a tenant"""
     db = await obj.use(DBContext)
     async with db.session() as session:
-        tenant = (
-            await session.execute(model.Tenant.select(name=name))
-        ).scalar_one_or_none()
+        tenant = await session.scalar(model.Tenant.select(name=name))
         if not tenant:
             click.echo(f"Tenant {name!r} not found")
             return
@@ -108,7 +102,7 @@ async def list_(obj: ServiceRegistry, table_format: str):
     db = await obj.use(DBContext)
     tbl = Table()
     async with db.session() as session:
-        tenants = (await session.execute(model.Tenant.select())).scalars()
+        tenants = await session.scalars(model.Tenant.select())
         for tenant in tenants:
             tbl.row(
                 tenant=tenant.name,
@@ -0,0 +1,45 @@
+"""Index meeting_stats by tenant and meeting
+
+Revision ID: 7f231e56e5e9
+Revises: 91382557ef81
+Create Date: 2026-10-15 16:31:52.356691
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7f231e56e5e9"
+down_revision: Union[str, Sequence[str], None] = "91382557ef81"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build indexes without locking the table against writes (PostgreSQL).
+    # CONCURRENTLY does not work within a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_meeting_stats_tenant_fk"),
+            "meeting_stats",
+            ["tenant_fk"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_meeting_stats_uuid"),
+            "meeting_stats",
+            ["uuid"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_meeting_stats_uuid"), table_name="meeting_stats")
+    op.drop_index(op.f("ix_meeting_stats_tenant_fk"), table_name="meeting_stats")
@@ -0,0 +1,39 @@
+"""Add a GIN index for recording metadata searches (postgres only)
+
+Revision ID: c2d7a9e14b36
+Revises: f784f9383ba5
+Create Date: 2026-10-15 18:02:41.113520
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2d7a9e14b36"
+down_revision: Union[str, Sequence[str], None] = "f784f9383ba5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_recordings_meta",
+                "recordings",
+                ["meta"],
+                unique=False,
+                postgresql_using="gin",
+                postgresql_ops={"meta": "jsonb_path_ops"},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == "postgresql":
+        op.drop_index("ix_recordings_meta", table_name="recordings")
@@ -0,0 +1,37 @@
+"""Index meeting_stats by timestamp (BRIN on PostgreSQL)
+
+Revision ID: f784f9383ba5
+Revises: 7f231e56e5e9
+Create Date: 2026-10-15 16:32:15.539677
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f784f9383ba5"
+down_revision: Union[str, Sequence[str], None] = "7f231e56e5e9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_meeting_stats_ts",
+            "meeting_stats",
+            ["ts"],
+            unique=False,
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_meeting_stats_ts", table_name="meeting_stats")
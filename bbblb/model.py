@@ -1,4 +1,5 @@
 import enum
+import functools
 import logging
 import typing
 from uuid import UUID
@@ -11,6 +12,7 @@ from sqlalchemy import (
     ColumnExpressionArgument,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     MetaData,
@@ -18,11 +20,13 @@ from sqlalchemy import (
     Text,
     TypeDecorator,
     UniqueConstraint,
+    bindparam,
     select,  # noqa: F401
     delete,  # noqa: F401
     update,  # noqa: F401
     insert,  # noqa: F401
     func,  # noqa: F401
+    inspect,
 )
 from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, AsyncConnection
 
@@ -66,36 +70,42 @@ def utcnow():
 async def get_or_create(
     session: AsyncSession,
     select: Select[typing.Tuple[R]],
-    create: typing.Callable[[], R],
+    entity: type[R],
+    values: dict[str, typing.Any],
+    conflict_cols: list[str] | None = None,
 ) -> tuple[R, bool]:
     """Get or create an entity. Returns the entity and a boolean singaling if
     the entity was created. The session is committed to make sure the object
     could really be created.
 
     The function first tries to fetch the model with the `select` statement.
-    If there is no result, it calls the `create` callable and tries to
-    ass the entity and commit the session. If that fails with an IntegrityError,
-    we assume someone else created the entity in the meantime. We fetch and
-    return it.
-
-    The select statement should return the created entity, or the function
-    will throw NoResultFound during the second attempt to fetch the entity.
+    If there is no result, it inserts a new row with the given column `values`
+    and does nothing if the row conflicts with an existing one (on the
+    `conflict_cols` unique constraint, or any constraint if not specified).
+    In both cases the row is then fetched with `select`, so concurrent
+    inserts never abort the transaction.
+
+    Values must be plain column values (e.g. `tenant_fk=tenant.id` instead of
+    `tenant=tenant`). The select statement should return the created entity,
+    or the function will throw NoResultFound.
     """
     model = (await session.execute(select)).scalar_one_or_none()
     if model:
         return model, False
-    model = create()
-    session.add(model)
-    try:
-        await session.commit()
-        return model, True
-    except IntegrityError:
-        await session.rollback()
-        return (await session.execute(select)).scalar_one(), False
-
-
-def upsert(conn: AsyncConnection, model: "type[Base]"):
-    if conn.dialect.name == "sqlite":
+    stmt = upsert(session, entity).values(values)
+    stmt = stmt.on_conflict_do_nothing(index_elements=conflict_cols)
+    stmt = stmt.returning(*inspect(entity).primary_key)
+    created = (await session.execute(stmt)).first() is not None
+    await session.commit()
+    return (await session.execute(select)).scalar_one(), created
+
+
+def upsert(conn: AsyncConnection | AsyncSession, model: "type[Base]"):
+    if isinstance(conn, AsyncSession):
+        dialect = conn.get_bind().dialect
+    else:
+        dialect = conn.dialect
+    if dialect.name == "sqlite":
         return sqlite_upsert(model)
     else:
         return postgres_upsert(model)
@@ -115,7 +125,8 @@ class NewlineSeparatedList(TypeDecorator):
     def process_result_value(self, value: str | None, dialect) -> List[str] | None:
         if value is None:
             return None
-        return value.split("\n")
+        # An empty list is stored as an empty string, not as [""]
+        return value.split("\n") if value else []
 
 
 class IntEnum(TypeDecorator):
@@ -125,6 +136,8 @@ class IntEnum(TypeDecorator):
     def __init__(self, enum_type: type[enum.Enum]):
         super().__init__()
         self.enum_type = enum_type
+        # Plain dict lookups are a lot faster than calling the enum type
+        self._members = {member.value: member for member in enum_type}
 
     def process_bind_param(self, value: enum.Enum | None, dialect):
         if value is None:
@@ -134,14 +147,9 @@ class IntEnum(TypeDecorator):
         return value.value
 
     def process_result_value(self, value: int | None, dialect):
-        if value is None:
-            return None
-        try:
-            return self.enum_type(value)
-        except ValueError:
-            # Handle cases where the integer from the DB doesn't match an enum member
-            # You might want to log this or raise a more specific error
-            return None
+        # Integers from the DB that do not match an enum member (or NULL)
+        # are returned as None.
+        return self._members.get(value)
 
 
 class ORMMixin:
@@ -350,9 +358,26 @@ class Server(Base):
     def select_best(cls, tenant: Tenant):
         return cls.select_available(tenant).order_by(Server.load).limit(1)
 
-    def increment_load_stmt(self, load: float):
-        return (
-            update(Server).where(Server.id == self.id).values(load=Server.load + load)
+    @classmethod
+    async def reserve_best(
+        cls, session: AsyncSession, tenant: Tenant, load: float
+    ) -> "Server | None":
+        """Find the best server for a new meeting and increase its load in a
+        single statement. Servers locked by concurrent reservations are
+        skipped, unless there is no other choice."""
+        params = {"load_delta": load}
+        for skip_locked in (True, False):
+            stmt = _server_reserve_stmt(skip_locked)
+            server = (await session.execute(stmt, params)).scalar_one_or_none()
+            if server:
+                return server
+        return None
+
+    async def increment_load(self, session: AsyncSession, load: float):
+        """Atomically increase the load of this server in the database.
+        The in-memory `load` attribute is not updated."""
+        await session.execute(
+            _SERVER_INCREMENT_LOAD, {"server_id": self.id, "load_delta": load}
         )
 
     def mark_error(self, fail_threshold: int):
@@ -396,6 +421,34 @@ class Server(Base):
         return f"Server({self.domain})"
 
 
+#: Built once and reused on the hot create/join paths. Bound parameters are not
+#: visible to the in-session evaluator, so session synchronization is skipped.
+_SERVER_INCREMENT_LOAD = (
+    update(Server)
+    .where(Server.id == bindparam("server_id"))
+    .values(load=Server.load + bindparam("load_delta"))
+    .execution_options(synchronize_session=False)
+)
+
+
+@functools.cache
+def _server_reserve_stmt(skip_locked: bool):
+    # Tenants are not considered yet (see Server.select_available), so the
+    # statement does not depend on request parameters and can be reused.
+    best = (
+        Server.select_best(typing.cast(Tenant, None))
+        .with_only_columns(Server.id)
+        .with_for_update(skip_locked=skip_locked)
+        .scalar_subquery()
+    )
+    return (
+        update(Server)
+        .where(Server.id == best)
+        .values(load=Server.load + bindparam("load_delta"))
+        .returning(Server)
+    )
+
+
 class Meeting(Base):
     __tablename__ = "meetings"
     __table_args__ = (UniqueConstraint("external_id", "tenant_fk"),)
@@ -424,15 +477,27 @@ class Meeting(Base):
 
 class MeetingStats(Base):
     __tablename__ = "meeting_stats"
+    __table_args__ = (
+        # Stats are append-only and ordered by time, which is what BRIN
+        # indexes are good at. Other databases get a regular index.
+        Index(
+            "ix_meeting_stats_ts",
+            "ts",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     ts: Mapped[datetime.datetime] = mapped_column(
         DateTime(timezone=True), insert_default=utcnow, nullable=False
     )
-    uuid: Mapped[UUID] = mapped_column(nullable=False)
+    uuid: Mapped[UUID] = mapped_column(nullable=False, index=True)
     meeting_id: Mapped[str] = mapped_column(nullable=False)
 
-    tenant_fk: Mapped[int] = mapped_column(ForeignKey("tenants.id"), nullable=True)
+    tenant_fk: Mapped[int] = mapped_column(
+        ForeignKey("tenants.id"), nullable=True, index=True
+    )
     tenant: Mapped["Tenant"] = relationship(lazy=True)
 
     users: Mapped[int] = mapped_column(nullable=False, default=0)
@@ -471,6 +536,15 @@ class RecordingState(enum.StrEnum):
 
 class Recording(Base):
     __tablename__ = "recordings"
+    __table_args__ = (
+        # Speeds up `meta @> {...}` searches in getRecordings (postgres only)
+        Index(
+            "ix_recordings_meta",
+            "meta",
+            postgresql_using="gin",
+            postgresql_ops={"meta": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -523,8 +597,12 @@ class PlaybackFormat(Base):
     recording: Mapped[Recording] = relationship(back_populates="formats")
     format: Mapped[str] = mapped_column(nullable=False)
 
-    # We need this for getMeetings search results, so store it ...
-    xml: Mapped[str] = mapped_column(nullable=False)
+    # We need this for getRecordings search results, so store it ...
+    # Deferred because it is large and only needed there. Load it with
+    # `undefer(PlaybackFormat.xml)` when needed.
+    xml: Mapped[str] = mapped_column(
+        nullable=False, deferred=True, deferred_raiseload=True
+    )
 
 
 # class Task(Base):
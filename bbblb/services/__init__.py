@@ -252,6 +252,7 @@ async def bootstrap(
     import bbblb.services.bbb
     import bbblb.services.health
     import bbblb.services.tenants
+    import bbblb.services.servers
 
     if logging:
 
@@ -270,6 +271,9 @@ async def bootstrap(
             config.DB,
             create=config.DB_CREATE,
             migrate=config.DB_MIGRATE,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_POOL_OVERFLOW,
+            warmup=autostart,
         ),
     )
     ctx.register(bbblb.services.bbb.BBBHelper())
@@ -284,6 +288,7 @@ async def bootstrap(
         bbblb.services.analytics.AnalyticsHandler(config),
     )
     ctx.register(bbblb.services.tenants.TenantCache(config))
+    ctx.register(bbblb.services.servers.ServerCache(config))
 
     if autostart:
         for service_type in ctx.services:
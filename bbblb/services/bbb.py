@@ -1,5 +1,9 @@
 from datetime import timedelta
+import functools
+import hashlib
+import hmac
 import logging
+import random
 import time
 from bbblb import model
 from bbblb.lib.bbb import BBBClient
@@ -18,6 +22,28 @@ LOG = logging.getLogger(__name__)
 
 JWT_ALGORITHMS = ["HS256", "HS384", "HS512"]
 
+CALLBACK_END_PREFIX = b"bbblb:callback:end:"
+
+#: Tokens or payloads larger than this (in bytes) are encoded or decoded in a
+#: worker thread, so PyJWT's pure-python JSON handling does not block the loop.
+JWT_THREAD_THRESHOLD = 4096
+
+
+@functools.lru_cache(maxsize=8)
+def _callback_hmac(secret: str) -> hmac.HMAC:
+    """Return a keyed HMAC object that is copied for each new signature, so
+    the key setup is only done once per secret."""
+    return hmac.new(secret.encode("UTF8"), CALLBACK_END_PREFIX, hashlib.sha256)
+
+
+async def jwt_decode(token: str, key: str, **options) -> dict:
+    """Decode and verify a JWT, offloading large tokens to a worker thread."""
+    if len(token) > JWT_THREAD_THRESHOLD:
+        return await asyncio.to_thread(
+            jwt.decode, token, key, algorithms=JWT_ALGORITHMS, **options
+        )
+    return jwt.decode(token, key, algorithms=JWT_ALGORITHMS, **options)
+
 
 class BBBHelper(BackgroundService):
     async def on_start(self, config: BBBLBConfig, db: DBContext):
@@ -75,6 +101,12 @@ class BBBHelper(BackgroundService):
                 LOG.debug(f"Cleaned up {result.rowcount} stale meetings")
             return result.rowcount
 
+    def sign_end_callback(self, meeting_uuid: str) -> str:
+        """Return the hex signature for an (unsigned) meetingEndedURL callback."""
+        sig = _callback_hmac(self.config.SECRET).copy()
+        sig.update(meeting_uuid.encode("ASCII"))
+        return sig.hexdigest()
+
     def make_http_client(self) -> aiohttp.ClientSession:
         return aiohttp.ClientSession(connector=self.connector, connector_owner=False)
 
@@ -90,7 +122,9 @@ class BBBHelper(BackgroundService):
         json: object | None = None,
         headers: dict[str, str] | None = None,
     ):
-        for i in range(self.config.WEBHOOK_RETRY):
+        retries = self.config.WEBHOOK_RETRY
+        timeout = aiohttp.ClientTimeout(total=self.config.WEBHOOK_TIMEOUT)
+        for i in range(retries):
             async with self.make_http_client() as client:
                 try:
                     async with client.request(
@@ -100,14 +134,15 @@ class BBBHelper(BackgroundService):
                         data=data,
                         json=json,
                         headers=headers,
+                        timeout=timeout,
                     ) as rs:
                         rs.raise_for_status()
-                except aiohttp.ClientError:
-                    LOG.warning(
-                        f"Failed to forward callback {url} ({i + 1}/{self.config.WEBHOOK_RETRY})"
-                    )
-                    await asyncio.sleep(10 * i)
-                    continue
+                        return
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    LOG.warning(f"Failed to forward callback {url} ({i + 1}/{retries})")
+            if i + 1 < retries:
+                # Exponential backoff with jitter
+                await asyncio.sleep(min(30, 2**i) + random.random())
 
     async def fire_unsigned_callback(
         self, callback: model.Callback, params: typing.Mapping[str, str] | None = None
@@ -116,31 +151,63 @@ class BBBHelper(BackgroundService):
         if callback.forward:
             await self._trigger_callback("GET", callback.forward, params=params)
 
-    async def fire_analytics_callback(
-        self, callback: model.Callback, payload: object = None
+    async def fire_analytics_callbacks(
+        self, callbacks: typing.Iterable[model.Callback], payload: object = None
     ):
-        """Fire an 'analytics' style callback with an Authorization header
-        (Bearer, JWT) and unsigned JSON payload."""
-        if callback.forward:
-            timeout = 24 * 6300  # Default timeout used by BBB
+        """Fire 'analytics' style callbacks with an Authorization header
+        (Bearer, JWT) and unsigned JSON payload. Requests run concurrently
+        and tokens are only created once per tenant secret."""
+        timeout = 24 * 6300  # Default timeout used by BBB
+        claims = {"exp": int(time.time()) + timeout}
+        tokens: dict[str, str] = {}
+        requests = []
+        for callback in callbacks:
+            if not callback.forward:
+                continue
             key = callback.tenant.secret
-            token = jwt.encode(
-                {"exp": int(time.time()) + timeout}, key, JWT_ALGORITHMS[0]
-            )
-            await self._trigger_callback(
-                "POST",
-                callback.forward,
-                json=payload,
-                headers={"Authorization": f"bearer {token}"},
+            if key not in tokens:
+                tokens[key] = jwt.encode(claims, key, JWT_ALGORITHMS[0])
+            requests.append(
+                self._trigger_callback(
+                    "POST",
+                    callback.forward,
+                    json=payload,
+                    headers={"Authorization": f"bearer {tokens[key]}"},
+                )
             )
+        await self._gather_callbacks(requests)
 
-    async def fire_signed_callback(self, callback: model.Callback, payload: dict):
-        """Fire a 'recording-ready' style callback using a form request
-        wrapping JWT encoded (signed) payload."""
-        if callback.forward:
+    async def fire_signed_callbacks(
+        self, callbacks: typing.Iterable[model.Callback], payload: dict
+    ):
+        """Fire 'recording-ready' style callbacks using a form request
+        wrapping JWT encoded (signed) payload. Requests run concurrently and
+        the payload is only signed once per tenant secret."""
+        signed: dict[str, str] = {}
+        requests = []
+        for callback in callbacks:
+            if not callback.forward:
+                continue
             key = callback.tenant.secret
-            await self._trigger_callback(
-                "POST",
-                callback.forward,
-                data={"signed_parameters": jwt.encode(payload, key, JWT_ALGORITHMS[0])},
+            if key not in signed:
+                # Signed payloads (e.g. recording-ready) can be large and
+                # this runs in the background anyway, so always offload.
+                signed[key] = await asyncio.to_thread(
+                    jwt.encode, payload, key, JWT_ALGORITHMS[0]
+                )
+            requests.append(
+                self._trigger_callback(
+                    "POST",
+                    callback.forward,
+                    data={"signed_parameters": signed[key]},
+                )
             )
+        await self._gather_callbacks(requests)
+
+    async def _gather_callbacks(self, requests: list[typing.Awaitable]):
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        for result in results:
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                LOG.error("Failed to forward callback", exc_info=result)
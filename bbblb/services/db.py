@@ -1,4 +1,5 @@
 import asyncio
+import functools
 from contextlib import asynccontextmanager
 import logging
 from pathlib import Path
@@ -29,10 +30,21 @@ class DBContext(ManagedService, HealthReportingMixin):
     engine: AsyncEngine | None = None
     sessionmaker: async_sessionmaker[AsyncSession] | None = None
 
-    def __init__(self, db_url: str, create=False, migrate=False):
+    def __init__(
+        self,
+        db_url: str,
+        create=False,
+        migrate=False,
+        pool_size=10,
+        max_overflow=10,
+        warmup=False,
+    ):
         self._db_url = db_url
         self._create = create
         self._migrate = migrate
+        self._pool_size = pool_size
+        self._max_overflow = max_overflow
+        self._warmup = warmup
 
     async def on_start(self):
         if self.engine or self.sessionmaker:
@@ -42,17 +54,11 @@ class DBContext(ManagedService, HealthReportingMixin):
             if self._create:
                 await create_database(self._db_url)
 
-            current, target = await check_migration_state(self._db_url)
-            if current != target and self._migrate:
-                await migrate_db(self._db_url)
-            elif current != target:
-                LOG.error(f"Expected schema revision {target!r} but found {current!r}.")
-                raise RuntimeError("Database migrations pending. Run migrations first.")
-
             try:
-                self.engine = create_async_engine(_async_db_url(self._db_url))
-                self.sessionmaker = async_sessionmaker(
-                    self.engine, expire_on_commit=False
+                self.engine = create_engine(
+                    self._db_url,
+                    pool_size=self._pool_size,
+                    max_overflow=self._max_overflow,
                 )
 
                 # Enable foreign key support in sqlite
@@ -62,7 +68,27 @@ class DBContext(ManagedService, HealthReportingMixin):
                     def _fk_pragma_on_connect(conn, con_record):  # noqa
                         conn.execute("pragma foreign_keys=ON")
 
+                current, target = await check_migration_state(self._db_url, self.engine)
+                if current != target and self._migrate:
+                    await migrate_db(self._db_url)
+                elif current != target:
+                    LOG.error(
+                        f"Expected schema revision {target!r} but found {current!r}."
+                    )
+                    raise RuntimeError(
+                        "Database migrations pending. Run migrations first."
+                    )
+
+                self.sessionmaker = async_sessionmaker(
+                    self.engine, expire_on_commit=False
+                )
+
+                if self._warmup and "sqlite" not in self.engine.url.drivername:
+                    await self._warmup_pool()
+
             except BaseException:
+                if self.engine:
+                    await self.engine.dispose()
                 self.engine = self.sessionmaker = None
                 raise
 
@@ -71,6 +97,26 @@ class DBContext(ManagedService, HealthReportingMixin):
         except Exception as e:
             raise RuntimeError(f"Failed to initialize database: {e}")
 
+    async def _warmup_pool(self):
+        """Open all pooled connections concurrently, so the first requests
+        do not have to wait for connection setup and authentication."""
+        engine = self.engine
+        assert engine
+
+        # Check out all connections at the same time before returning any of
+        # them, or fast connections would be re-used by other warm-up tasks
+        # and the pool would end up with less than pool_size connections.
+        conns = await asyncio.gather(
+            *(engine.connect() for _ in range(self._pool_size)),
+            return_exceptions=True,
+        )
+        opened = [conn for conn in conns if isinstance(conn, AsyncConnection)]
+        await asyncio.gather(*(conn.close() for conn in opened))
+        for error in conns:
+            if isinstance(error, BaseException):
+                raise error
+        LOG.debug(f"Opened {len(opened)} database connections")
+
     async def check_health(self) -> tuple[Health, str]:
         if not self.engine:
             return Health.UNKNOWN, "Not connected"
@@ -86,10 +132,12 @@ class DBContext(ManagedService, HealthReportingMixin):
             await self.engine.dispose()
             self.engine = self.sessionmaker = None
 
-    def session(self) -> AsyncSession:
+    def session(self, autoflush=True) -> AsyncSession:
+        """Create a new session. Sessions that only read from the database
+        can disable `autoflush` to skip the flush check before each query."""
         if not self.sessionmaker:
             raise RuntimeError("Database engine not initialized")
-        return self.sessionmaker()
+        return self.sessionmaker(autoflush=autoflush)
 
     @asynccontextmanager
     async def begin(self) -> typing.AsyncIterator[AsyncSessionTransaction]:
@@ -97,14 +145,43 @@ class DBContext(ManagedService, HealthReportingMixin):
             yield tx
 
     @asynccontextmanager
-    async def connect(self) -> typing.AsyncIterator[AsyncConnection]:
-        """Create a connection and begin a transaction."""
+    async def connect(self, autocommit=False) -> typing.AsyncIterator[AsyncConnection]:
+        """Create a connection and begin a transaction.
+
+        With `autocommit` enabled, no transaction is started and each
+        statement is committed on its own. This saves the BEGIN and COMMIT
+        round-trips for single statement operations."""
         if not self.engine:
             raise RuntimeError("Database engine not initialized")
+        if autocommit:
+            async with self.engine.connect() as conn:
+                yield await conn.execution_options(isolation_level="AUTOCOMMIT")
+            return
         async with self.engine.begin() as conn:
             yield conn
 
 
+def create_engine(db_url, pool_size=10, max_overflow=10) -> AsyncEngine:
+    """Create a pooled async engine for the given database URL.
+
+    Pooled connections are pinged before use and recycled after 30
+    minutes, so connections dropped by the server or a proxy do not
+    surface as errors in requests."""
+    db_url = _async_db_url(db_url)
+    connect_args = {}
+    if db_url.drivername == "postgresql+asyncpg":
+        # JIT compilation only slows down the short queries we run
+        connect_args["server_settings"] = {"jit": "off"}
+    return create_async_engine(
+        db_url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        connect_args=connect_args,
+    )
+
+
 def _async_db_url(db_url) -> sqlalchemy.engine.url.URL:
     if isinstance(db_url, str):
         db_url = sqlalchemy.engine.url.make_url(db_url)
@@ -163,30 +240,53 @@ async def create_database(db_url):
         await tmp_engine.dispose()
 
 
-async def check_migration_state(db_url):
-    import alembic
+@functools.cache
+def _script_head():
+    """Return the head revision of the bundled migration scripts. Scanning
+    the scripts directory is slow, so this is only done once."""
     import alembic.script
+
+    script_dir = Path(migrations.__file__).parent
+    return alembic.script.ScriptDirectory(script_dir).get_current_head()
+
+
+async def check_migration_state(db_url, engine: AsyncEngine | None = None):
+    """Return the current and the expected schema revision of a database.
+
+    An existing `engine` is used if given, otherwise a temporary one is
+    created for the given URL."""
     import alembic.migration
 
     def check(conn):
-        script_dir = Path(migrations.__file__).parent
-        script = alembic.script.ScriptDirectory(script_dir)
         context = alembic.migration.MigrationContext.configure(conn)
-        return context.get_current_revision(), script.get_current_head()
+        return context.get_current_revision()
+
+    target = await asyncio.to_thread(_script_head)
+    if engine:
+        async with engine.connect() as conn:
+            return await conn.run_sync(check), target
 
     engine = create_async_engine(
         _async_db_url(db_url), poolclass=sqlalchemy.pool.NullPool
     )
+    try:
+        async with engine.connect() as conn:
+            return await conn.run_sync(check), target
+    finally:
+        await engine.dispose()
 
-    async with engine.connect() as conn:
-        return await conn.run_sync(check)
 
+async def migrate_db(db_url, sql=False, start: str | None = None):
+    return await asyncio.to_thread(migrate_db_sync, db_url, sql, start)
 
-async def migrate_db(db_url):
-    return await asyncio.to_thread(migrate_db_sync, db_url)
 
+def migrate_db_sync(db_url, sql=False, start: str | None = None):
+    """Upgrade the database schema to the latest revision.
 
-def migrate_db_sync(db_url):
+    With `sql` enabled, the database is not touched. Instead, the SQL
+    statements needed to upgrade from the `start` revision (or an empty
+    database) are printed to stdout, so they can be reviewed and applied
+    out of band."""
     import alembic
     import alembic.config
     import alembic.command
@@ -196,4 +296,5 @@ def migrate_db_sync(db_url):
     alembic_cfg = alembic.config.Config()
     alembic_cfg.set_main_option("script_location", str(alembic_dir))
     alembic_cfg.set_main_option("sqlalchemy.url", db_url)
-    alembic.command.upgrade(alembic_cfg, "heads")
+    target = f"{start}:heads" if sql and start else "heads"
+    alembic.command.upgrade(alembic_cfg, target, sql=sql)
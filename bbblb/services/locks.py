@@ -4,6 +4,10 @@ import logging
 import os
 import secrets
 import socket
+import typing
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
 from bbblb import model
 from bbblb.services import ManagedService
 from bbblb.services.db import DBContext
@@ -12,6 +16,43 @@ LOG = logging.getLogger(__name__)
 
 PROCESS_IDENTITY = f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(4)}"
 
+# Lock statements are built once and only executed with different parameters.
+# The acquire statement is dialect specific and built on first use.
+_LOCK_MATCH = (
+    model.Lock.name == model.bindparam("lock_name"),
+    model.Lock.owner == model.bindparam("lock_owner"),
+)
+_LOCK_CHECK = (
+    model.update(model.Lock).where(*_LOCK_MATCH).values(ts=model.bindparam("lock_ts"))
+)
+_LOCK_RELEASE = model.delete(model.Lock).where(*_LOCK_MATCH)
+_LOCK_RELEASE_ALL = model.delete(model.Lock).where(
+    model.Lock.owner == model.bindparam("lock_owner")
+)
+_LOCK_ACQUIRE: dict[tuple[str, bool], typing.Any] = {}
+
+
+def _acquire_stmt(conn: AsyncConnection, expires: bool):
+    key = (conn.dialect.name, expires)
+    if key not in _LOCK_ACQUIRE:
+        stmt = model.upsert(conn, model.Lock).values(
+            name=model.bindparam("lock_name"),
+            owner=model.bindparam("lock_owner"),
+            ts=model.bindparam("lock_ts"),
+        )
+        if expires:
+            # Insert a new lock or take over an expired one, atomically
+            # and in a single statement.
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["name"],
+                set_={"owner": stmt.excluded.owner, "ts": stmt.excluded.ts},
+                where=model.Lock.ts < model.bindparam("lock_expire"),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
+        _LOCK_ACQUIRE[key] = stmt
+    return _LOCK_ACQUIRE[key]
+
 
 class LockManager(ManagedService):
     async def on_start(self, db: DBContext):
@@ -20,10 +61,8 @@ class LockManager(ManagedService):
 
     async def on_shutdown(self):
         LOG.debug("Log manager shutdown. Releasing locks...")
-        async with self.db.connect() as conn:
-            await conn.execute(
-                model.delete(model.Lock).where(model.Lock.owner == PROCESS_IDENTITY)
-            )
+        async with self.db.connect(autocommit=True) as conn:
+            await conn.execute(_LOCK_RELEASE_ALL, {"lock_owner": PROCESS_IDENTITY})
 
     def create(self, name, timeout: datetime.timedelta):
         return NamedLock(self, name, timeout)
@@ -35,46 +74,38 @@ class NamedLock:
         self.name = name
         self.timeout = timeout
 
+    def _params(self, **extra):
+        return {"lock_name": self.name, "lock_owner": PROCESS_IDENTITY, **extra}
+
     async def try_acquire(self):
         """Try to acquire a named inter-process lock and force-release any
         existing locks if they were older than the lock timeout.
 
         This is not re-entrant. Acquiring the same lock twice will fail.
         """
-        async with self.db.connect() as conn:
+        async with self.db.connect(autocommit=True) as conn:
+            now = model.utcnow()
+            params = self._params(lock_ts=now)
             if self.timeout:
-                expire = model.utcnow() - self.timeout
-                await conn.execute(
-                    model.delete(model.Lock).where(
-                        model.Lock.name == self.name, model.Lock.ts < expire
-                    )
-                )
-
-            result = await conn.execute(
-                model.upsert(conn, model.Lock)
-                .values(name=self.name, owner=PROCESS_IDENTITY)
-                .on_conflict_do_nothing(index_elements=["name"])
-            )
-            if result.rowcount == 0:
-                return False
+                params["lock_expire"] = now - self.timeout
+            stmt = _acquire_stmt(conn, bool(self.timeout))
 
             try:
-                await conn.commit()
-                LOG.debug(f"Lock {self.name!r} acquired by {PROCESS_IDENTITY}")
-                return True
+                result = await conn.execute(stmt, params)
             except model.OperationalError:
                 return False
 
+            if result.rowcount == 0:
+                return False
+            LOG.debug(f"Lock {self.name!r} acquired by {PROCESS_IDENTITY}")
+            return True
+
     async def check(self):
         """Update the lifetime of an already held lock, return true if such a
         lock exists, false otherwise."""
-        async with self.db.connect() as conn:
+        async with self.db.connect(autocommit=True) as conn:
             result = await conn.execute(
-                model.update(model.Lock)
-                .values(ts=model.utcnow())
-                .where(
-                    model.Lock.name == self.name, model.Lock.owner == PROCESS_IDENTITY
-                )
+                _LOCK_CHECK, self._params(lock_ts=model.utcnow())
             )
             if result.rowcount > 0:
                 LOG.debug(f"Lock {self.name!r} updated by {PROCESS_IDENTITY}")
@@ -89,13 +120,8 @@ class NamedLock:
         if will simply return `False` for all exceptions other any CancelledError.
         """
         try:
-            async with self.db.connect() as conn:
-                result = await conn.execute(
-                    model.delete(model.Lock).where(
-                        model.Lock.name == self.name,
-                        model.Lock.owner == PROCESS_IDENTITY,
-                    )
-                )
+            async with self.db.connect(autocommit=True) as conn:
+                result = await conn.execute(_LOCK_RELEASE, self._params())
                 if result.rowcount > 0:
                     LOG.debug(f"Lock {self.name!r} released by {PROCESS_IDENTITY}")
                     return True
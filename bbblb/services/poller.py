@@ -1,9 +1,10 @@
 import asyncio
 from dataclasses import dataclass
 import datetime
-import random
 import time
 
+from sqlalchemy.orm import selectinload
+
 from bbblb import model
 from bbblb.services import BackgroundService
 from bbblb.lib.bbb import BBBError
@@ -28,6 +29,53 @@ class ServerStats:
     load = 0.0
 
 
+@dataclass
+class PollResult:
+    server: model.Server
+    success: bool
+    stats: ServerStats
+    meeting_stats: list[model.MeetingStats]
+    forget_ids: list[int]
+
+
+# Plain (non-ORM) updates, so they can be executed for many servers at once.
+_SERVERS = model.Server.__table__
+_UPDATE_FAILED = (
+    model.update(_SERVERS)
+    .where(_SERVERS.c.id == model.bindparam("server_id"))
+    .values(
+        health=model.bindparam("new_health"),
+        errors=model.bindparam("new_errors"),
+        recover=model.bindparam("new_recover"),
+    )
+)
+_UPDATE_HEALTHY = _UPDATE_FAILED.values(
+    load=model.bindparam("new_load"),
+    stats=model.bindparam("new_stats"),
+)
+
+# None of the deleted meetings are present in the session storing results.
+_DELETE_MEETINGS = (
+    model.delete(model.Meeting)
+    .where(model.Meeting.id.in_(model.bindparam("meeting_ids", expanding=True)))
+    .execution_options(synchronize_session=False)
+)
+
+# Servers with their meetings, as needed by a poll round. Meetings without an
+# internal ID cannot be matched and are skipped, and only the columns needed
+# to match and record them are loaded.
+_SELECT_SERVERS = model.Server.select().options(
+    selectinload(model.Server.meetings.and_(model.Meeting.internal_id.is_not(None)))
+    .load_only(
+        model.Meeting.internal_id,
+        model.Meeting.uuid,
+        model.Meeting.external_id,
+        model.Meeting.tenant_fk,
+    )
+    .lazyload("*")
+)
+
+
 class MeetingPoller(BackgroundService):
     def __init__(self, config: BBBLBConfig):
         self.config = config
@@ -46,20 +94,25 @@ class MeetingPoller(BackgroundService):
         await super().on_start()
 
     async def run(self):
+        backoff = 1.0
         while True:
             try:
-                # Short random sleep to give other proceses a chance
-                await asyncio.sleep(random.random() * self.interval)
-
-                # Run loop while holding the lock, or continue and try again
-                await self.lock.try_run_locked(self.poll_loop)
+                # Run loop while holding the lock, or back off and try again
+                acquired, _ = await self.lock.try_run_locked(self.poll_loop)
+                if acquired:
+                    backoff = 1.0
+                else:
+                    await asyncio.sleep(min(self.interval, backoff))
+                    backoff *= 2
 
             except asyncio.CancelledError:
                 LOG.info("Poller shutting down...")
                 raise
             except Exception:
                 LOG.exception("Unhandled polling error")
-                continue  # Recover by starting another loop
+                # Recover by starting another loop, but do not spin
+                await asyncio.sleep(min(self.interval, backoff))
+                backoff *= 2
 
     async def poll_loop(self):
         while True:
@@ -69,18 +122,28 @@ class MeetingPoller(BackgroundService):
                 LOG.warning(f"We lost the {self.lock.name!r} lock!?")
                 break
 
-            async with self.db.session() as session:
-                result = await session.execute(model.Server.select())
-                servers = result.scalars()
+            # Load all servers and their meetings in one go. The poll tasks
+            # only need a database connection again to store results.
+            async with self.db.session(autoflush=False) as session:
+                servers = (await session.execute(_SELECT_SERVERS)).scalars().all()
 
             futures = [
-                asyncio.ensure_future(self.poll_one(server.id)) for server in servers
+                asyncio.ensure_future(self.poll_one(server)) for server in servers
             ]
             while futures:
                 done, futures = await asyncio.wait(
                     futures, timeout=(self.lock.timeout * 0.8).total_seconds()
                 )
 
+                results = []
+                for future in done:
+                    if error := future.exception():
+                        LOG.error("Unhandled polling error", exc_info=error)
+                    elif result := future.result():
+                        results.append(result)
+                if results:
+                    await self.store_results(results)
+
                 if futures and not await self.lock.check():
                     LOG.warning(f"We lost the {self.lock.name!r} lock!?")
                     for future in futures:
@@ -93,16 +156,16 @@ class MeetingPoller(BackgroundService):
                 LOG.warning(f"Poll took longer than {self.interval}s ({dt:.1}s total)")
             await asyncio.sleep(max(1.0, sleep))
 
-    async def poll_one(self, server_id):
-        async with self.db.session() as session:
-            server = (
-                await session.execute(model.Server.select(id=server_id))
-            ).scalar_one()
-            meetings: dict[str, model.Meeting] = {
-                meeting.internal_id: meeting
-                for meeting in await server.awaitable_attrs.meetings
-                if meeting.internal_id
-            }
+    async def poll_one(self, server: model.Server) -> PollResult | None:
+        """Poll a single server and return the results without storing them.
+        The server must be loaded together with its meetings, but may be
+        detached from its session. Disabled servers without meetings are
+        skipped and return None."""
+        meetings: dict[str, model.Meeting] = {
+            meeting.internal_id: meeting
+            for meeting in server.meetings
+            if meeting.internal_id
+        }
 
         if not server.enabled:
             if not meetings:
@@ -119,19 +182,23 @@ class MeetingPoller(BackgroundService):
                 result = await client.action("getMeetings", timeout=self.timeout)
                 result.raise_on_error()
 
+            now = time.time()
             for mxml in result.xml.iterfind("meetings/meeting"):
-                endTime = int(mxml.findtext("endTime") or 0)
+                # One pass over the direct children instead of a findtext()
+                # scan per field. Nested values still need a path lookup.
+                fields = {child.tag: child.text for child in mxml}
+                endTime = int(fields.get("endTime") or 0)
                 if endTime > 0:
                     continue
 
-                meeting_id = mxml.findtext("internalMeetingID")
+                meeting_id = fields.get("internalMeetingID")
                 parent_id = mxml.findtext("breakout/parentMeetingID")
                 running_ids.add(meeting_id)
 
-                users = int(mxml.findtext("participantCount") or 0)
-                voice = int(mxml.findtext("voiceParticipantCount") or 0)
-                video = int(mxml.findtext("videoCount") or 0)
-                age = max(0.0, time.time() - int(mxml.findtext("createTime") or 0))
+                users = int(fields.get("participantCount") or 0)
+                voice = int(fields.get("voiceParticipantCount") or 0)
+                video = int(fields.get("videoCount") or 0)
+                age = max(0.0, now - int(fields.get("createTime") or 0))
                 try:
                     size_hint = int(mxml.findtext("meta/bbb-meeting-size-hint") or 0)
                 except ValueError:
@@ -173,62 +240,90 @@ class MeetingPoller(BackgroundService):
             LOG.warning(f"[{server.domain}] Server returned an error: {err}")
             success = False
 
-        async with self.db.session() as session:
-            if meeting_stats:
-                session.add_all(meeting_stats)
-
-            # Forget meetings not found on server
-            forget_ids = [
+        return PollResult(
+            server=server,
+            success=success,
+            stats=server_stats,
+            meeting_stats=meeting_stats,
+            forget_ids=[
                 meeting.id
                 for meeting in meetings.values()
                 if meeting.internal_id not in running_ids
-            ]
-            if forget_ids:
-                LOG.debug(
-                    f"[{server.domain}] Removing {len(forget_ids)} meetings that were not found on the server"
+            ],
+        )
+
+    async def store_results(self, results: list[PollResult]):
+        """Store the results of multiple polls in a single transaction."""
+        async with self.db.session() as session:
+            for result in results:
+                session.add_all(result.meeting_stats)
+
+            # Forget meetings not found on their server
+            forget_ids = [id for result in results for id in result.forget_ids]
+            chunk_size = 100
+            for offset in range(0, len(forget_ids), chunk_size):
+                await session.execute(
+                    _DELETE_MEETINGS,
+                    {"meeting_ids": forget_ids[offset : offset + chunk_size]},
                 )
-                chunk_size = 100
-                for offset in range(0, len(forget_ids), chunk_size):
-                    await session.execute(
-                        model.delete(model.Meeting).where(
-                            model.Meeting.id.in_(
-                                forget_ids[offset : offset + chunk_size]
-                            )
-                        )
+
+            # Servers were loaded at the start of this round and the poller is
+            # the only one changing their health, so no need to re-fetch them.
+            healthy, failed = [], []
+            for result in results:
+                server = result.server
+                if result.forget_ids:
+                    LOG.debug(
+                        f"[{server.domain}] Removing {len(result.forget_ids)} meetings that were not found on the server"
+                    )
+
+                old_health = server.health
+                stats = result.stats
+                if result.success:
+                    server.mark_success(self.minsuccess)
+                    healthy.append(
+                        {
+                            **self._health_params(server),
+                            "new_load": stats.load,
+                            "new_stats": {
+                                "meetings": stats.meetings,
+                                "users": stats.users,
+                                "voice": stats.voice,
+                                "video": stats.video,
+                                "largest": stats.largest,
+                            },
+                        }
                     )
+                else:
+                    server.mark_error(self.maxerror)
+                    failed.append(self._health_params(server))
 
-            # Re-fetch server from DB so we can update load and state values
-            server = (
-                await session.execute(model.Server.select(id=server_id))
-            ).scalar_one()
-
-            old_health = server.health
-
-            if success:
-                server.load = server_stats.load
-                server.stats = {
-                    "meetings": server_stats.meetings,
-                    "users": server_stats.users,
-                    "voice": server_stats.voice,
-                    "video": server_stats.video,
-                    "largest": server_stats.largest,
-                }
-                server.mark_success(self.minsuccess)
-            else:
-                server.mark_error(self.maxerror)
-
-            LOG.info(
-                f"[{server.domain}] {server.health.name} enabled={server.enabled} meetings={server_stats.meetings} users={server_stats.users} load={server_stats.load:.1f}"
-            )
-
-            # Log all state changes (including recovery) as warnings
-            if old_health != server.health:
-                LOG.warning(
-                    f"[{server.domain}] health changed from {old_health.name} to {server.health.name}"
+                LOG.info(
+                    f"[{server.domain}] {server.health.name} enabled={server.enabled} meetings={stats.meetings} users={stats.users} load={stats.load:.1f}"
                 )
 
+                # Log all state changes (including recovery) as warnings
+                if old_health != server.health:
+                    LOG.warning(
+                        f"[{server.domain}] health changed from {old_health.name} to {server.health.name}"
+                    )
+
+            if healthy:
+                await session.execute(_UPDATE_HEALTHY, healthy)
+            if failed:
+                await session.execute(_UPDATE_FAILED, failed)
+
             await session.commit()
 
+    @staticmethod
+    def _health_params(server: model.Server):
+        return {
+            "server_id": server.id,
+            "new_health": server.health,
+            "new_errors": server.errors,
+            "new_recover": server.recover,
+        }
+
     def get_meeting_load(self, users=2, voice=2, video=2, age=0.0, size_hint=0):
         config = self.config
 
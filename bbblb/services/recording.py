@@ -599,8 +599,9 @@ class RecordingImportTask:
             record, record_created = await model.get_or_create(
                 session,
                 stmt,
-                lambda: model.Recording(
-                    tenant=tenant,
+                model.Recording,
+                dict(
+                    tenant_fk=tenant.id,
                     record_id=record_id,
                     external_id=unscoped_id,
                     state=self.default_state,
@@ -609,6 +610,7 @@ class RecordingImportTask:
                     participants=participants,
                     meta=meta_dict,
                 ),
+                conflict_cols=["record_id"],
             )
             if not record_created:
                 if record.tenant_fk != tenant.id:
@@ -621,11 +623,13 @@ class RecordingImportTask:
             format, format_created = await model.get_or_create(
                 session,
                 stmt,
-                lambda: model.PlaybackFormat(
-                    recording=record,
+                model.PlaybackFormat,
+                dict(
+                    recording_fk=record.id,
                     format=format_name,
                     xml=lxml.etree.tostring(playback_node).decode("UTF-8"),
                 ),
+                conflict_cols=["recording_fk", "format"],
             )
             if not format_created:
                 pass  # TODO: Merge existing with new format?
@@ -656,9 +660,9 @@ class RecordingImportTask:
         # Fire callbacks in the background. They may take a while to
         # complete if the front-end is unresponsive.
         payload = {"meeting_id": metadata.unscoped_id, "record_id": metadata.record_id}
-        for callback in callbacks:
+        if callbacks:
             asyncio.create_task(
-                self.importer.bbb.fire_signed_callback(callback, payload)
+                self.importer.bbb.fire_signed_callbacks(callbacks, payload)
             )
 
     def _log(self, msg, level=logging.INFO, exc_info=None):
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from bbblb import model
+from bbblb.services import ManagedService
+from bbblb.services.db import DBContext
+
+import logging
+
+from bbblb.settings import BBBLBConfig
+
+LOG = logging.getLogger(__name__)
+
+
+class ServerCache(ManagedService):
+    """Cache server secrets by domain, so authenticating requests signed
+    by a BBB server (e.g. recording uploads) does not hit the database.
+
+    Only plain values are cached, not ORM instances, so entries stay valid
+    no matter what happens to the session that loaded them."""
+
+    def __init__(self, config: BBBLBConfig):
+        self.config = config
+        self.cache: dict[str, str] = {}
+        self.cache_timeout = max(1, config.TENANT_CACHE)
+        self.next_refresh = 0
+        self.refresh_lock = asyncio.Lock()
+
+    async def on_start(self, db: DBContext):
+        self.db = db
+
+    async def on_shutdown(self):
+        pass
+
+    async def refresh_cache(self, force=False):
+        async with self.refresh_lock:
+            if not force and self.next_refresh > time.time():
+                return False
+            stmt = model.select(model.Server.domain, model.Server.secret)
+            async with self.db.session(autoflush=False) as session:
+                results = (await session.execute(stmt)).all()
+            self.cache = {domain: secret for domain, secret in results}
+            self.next_refresh = time.time() + self.cache_timeout
+            return True
+
+    def invalidate(self):
+        """Force a refresh on the next lookup."""
+        self.next_refresh = 0
+
+    async def get_secret(self, domain: str) -> str | None:
+        await self.refresh_cache()
+        return self.cache.get(domain)
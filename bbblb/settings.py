@@ -168,6 +168,15 @@ class BBBLBConfig(BaseConfig):
     #: Run database schema migrations automatically on startup.
     DB_MIGRATE: bool = True
 
+    #: Number of database connections kept open per process. Make sure your
+    #: database allows at least (DB_POOL_SIZE + DB_POOL_OVERFLOW) connections
+    #: for each BBBLB process.
+    DB_POOL_SIZE: int = 10
+
+    #: Number of additional short-lived database connections allowed per
+    #: process if the pool is exhausted.
+    DB_POOL_OVERFLOW: int = 10
+
     #: The directory where BBBLB stores all its persistent data, including
     #: recordings, lockfiles, logs and more. Must be fully write-able for BBBLB
     #: and the `{PATH_DATA}/recordings` sub-directory must also be read-able by
@@ -180,10 +189,10 @@ class BBBLBConfig(BaseConfig):
     #: reach BBBLB.
     TENANT_HEADER: str = "Host"
 
-    #: Cache tenant info for a couple of seconds before requesting fresh info from the
-    #: database. Even a short cache time improves API latency by a lot. The only downside
-    #: is that tenant changes (e.g. new secret) may take a couple of seconds to take
-    #: effect.
+    #: Cache tenant and server info for a couple of seconds before requesting fresh info
+    #: from the database. Even a short cache time improves API latency by a lot. The only
+    #: downside is that tenant or server changes (e.g. new secret) may take a couple of
+    #: seconds to take effect.
     TENANT_CACHE: int = 10
 
     #: If true, meeting IDs are scoped with the tenant ID to avoid conflicts between
@@ -265,7 +274,12 @@ class BBBLBConfig(BaseConfig):
     #: How often to retry webhooks if the target fails to respond.
     WEBHOOK_RETRY: int = 3
 
-    #: Enable debug and SQL logs
+    #: Timeout in seconds for each individual webhook request. Requests that
+    #: time out are retried, so a target that accepts a webhook but responds
+    #: too slowly may receive it more than once.
+    WEBHOOK_TIMEOUT: int = 300
+
+    #: Enable debug and SQL logs, and pretty-print XML API responses
     DEBUG: bool = False
 
     def populate(self, verify=True, strict=True):
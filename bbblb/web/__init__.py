@@ -86,8 +86,11 @@ def make_routes(config: BBBLBConfig):
     static_dir.mkdir(parents=True, exist_ok=True)
 
     return [
-        Mount("/bigbluebutton/api", routes=bbbapi.api_routes),
+        # Reverse URL lookups (url_for) scan routes in order. The BBB API
+        # builds bbblb:* callback URLs on each create call, so mount the
+        # BBBLB API first to keep those lookups short.
         Mount("/bbblb/api", routes=bbblbapi.api_routes),
+        Mount("/bigbluebutton/api", routes=bbbapi.api_routes),
         # Serve /playback/* files in case the reverse proxy in front if BBBLB does not.
         Mount(
             "/playback",
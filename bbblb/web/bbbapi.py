@@ -1,7 +1,5 @@
 import asyncio
 import functools
-import hashlib
-import hmac
 import re
 import typing
 import uuid
@@ -37,6 +35,8 @@ CALLBACK_META_PATTERN = re.compile("^meta_(.+)-callback-url$")
 
 api_routes = []
 
+XML_MEDIA_TYPE = "application/xml;charset=utf-8"
+
 
 def api(action: str, methods=["GET", "POST"]):
     def decorator(func):
@@ -51,13 +51,14 @@ def api(action: str, methods=["GET", "POST"]):
                 LOG.exception("Unhandled exception")
                 out = make_error("internalError", repr(err), 500)
 
+            pretty = request.app.state.config.DEBUG
             if isinstance(out, BBBResponse):
                 if out._xml is not None:
-                    out = to_xml(out.xml, out.status_code)
+                    out = to_xml(out.xml, out.status_code, pretty)
                 else:
                     out = JSONResponse(out.json, out.status_code)
             elif isinstance(out, ETree):
-                out = to_xml(out, 200)
+                out = to_xml(out, 200, pretty)
             elif isinstance(out, dict):
                 out = JSONResponse(out, 200)
             return out
@@ -71,11 +72,13 @@ def api(action: str, methods=["GET", "POST"]):
     return decorator
 
 
-def to_xml(xml, status_code=200):
+def to_xml(xml, status_code=200, pretty=False):
+    """Serialize an XML response. Pretty printing is only worth the extra
+    work and bytes when a human reads the output, e.g. in debug mode."""
     return Response(
-        content=lxml.etree.tostring(xml, pretty_print=True),
+        content=lxml.etree.tostring(xml, pretty_print=pretty),
         status_code=status_code,
-        media_type="application/xml;charset=utf-8",
+        media_type=XML_MEDIA_TYPE,
     )
 
 
@@ -88,6 +91,10 @@ def xml_fix_meeting_id(node: ETree, search: str, replace: str):
     return node
 
 
+# Callback URL templates by (route name, root path, port)
+_callback_url_templates: dict[tuple[str, str, int | None], str] = {}
+
+
 class BBBApiRequest(ApiRequestContext):
     _tenant: model.Tenant | None = None
     _meeting: model.Meeting | None = None
@@ -130,12 +137,15 @@ class BBBApiRequest(ApiRequestContext):
             )
 
     async def require_bbb_query(self, allow_query_in_body=True):
-        """Return BBB API query parameters with the checksum verified and removed."""
+        """Return BBB API query parameters with the checksum verified and removed.
+
+        The checksum is only verified once per request. Each call returns a
+        new dict that can be modified freely."""
         if self._query is not None:
-            return self._query
+            return dict(self._query)
 
         tenant = await self.require_tenant()
-        action = self.request.url.path.split("/")[-1]
+        action = self.request.url.path.rpartition("/")[2]
         query_str = self.request.url.query
 
         # Some APIs allow passing query parameters in the request body. While the
@@ -156,13 +166,17 @@ class BBBApiRequest(ApiRequestContext):
                     "checksumError", "Request body too large, could not verify checksum"
                 )
 
-        query, _ = verify_checksum_query(action, query_str, [tenant.secret])
-        return query
+        self._query, _ = verify_checksum_query(action, query_str, [tenant.secret])
+        return dict(self._query)
 
     async def read_body(self) -> bytes:
         """Read the request body in a save (limited size) way"""
         if self._body is not None:
             return self._body
+        # Fail early if the client already tells us the body is too large
+        size = self.request.headers.get("Content-Length", "")
+        if size.isdigit() and int(size) > self.config.MAX_BODY:
+            raise make_error("clientError", "Request body too large", 413)
         body = bytearray()
         async for chunk in self.request.stream():
             body += chunk
@@ -171,6 +185,22 @@ class BBBApiRequest(ApiRequestContext):
         self._body = body
         return self._body
 
+    def callback_url(self, name: str, **params: str) -> str:
+        """Return the public URL of a BBBLB callback route.
+
+        Reverse route lookups are comparatively slow, so the URL is built
+        once per route and deployment path, and only the parameters are
+        filled in for each call."""
+        root_path = self.request.scope.get("root_path", "")
+        key = (name, root_path, self.request.url.port)
+        template = _callback_url_templates.get(key)
+        if template is None:
+            placeholders = {param: f"{{{param}}}" for param in params}
+            url = self.request.url_for(name, **placeholders)
+            url = url.replace(scheme="https", hostname=self.config.DOMAIN)
+            template = _callback_url_templates[key] = str(url)
+        return template.format(**params)
+
     async def require_param(
         self,
         name: str,
@@ -178,7 +208,9 @@ class BBBApiRequest(ApiRequestContext):
         type: typing.Callable[[str], R] = str,
     ) -> R:
         """Get a parameter from a query mal and raise an appropriate error if it's missing."""
-        query = await self.require_bbb_query()
+        if self._query is None:
+            await self.require_bbb_query()
+        query = typing.cast(dict[str, str], self._query)
         try:
             return type(query[name])
         except (KeyError, ValueError):
@@ -193,13 +225,19 @@ class BBBApiRequest(ApiRequestContext):
 ##
 
 
-@api("")
-async def handle_index(ctx: BBBApiRequest):
-    return XML.response(
+_INDEX_XML = lxml.etree.tostring(
+    XML.response(
         XML.returncode("SUCCESS"),
         XML.version("2.0"),
         XML.info(f"Served by {bbblb.BRANDING}"),
     )
+)
+
+
+@api("")
+async def handle_index(ctx: BBBApiRequest):
+    # Constant response, serialized only once
+    return Response(_INDEX_XML, media_type=XML_MEDIA_TYPE)
 
 
 ##
@@ -232,11 +270,10 @@ async def _intercept_callbacks(
             )
         )
     # No signed payload, so we sign the URL instead.
-    sig = f"bbblb:callback:end:{meeting.uuid}".encode("ASCII")
-    sig = hmac.digest(cxt.config.SECRET.encode("UTF8"), sig, hashlib.sha256).hex()
-    url = cxt.request.url_for("bbblb:callback_end", uuid=str(meeting.uuid), sig=sig)
-    url = url.replace(scheme="https", hostname=cxt.config.DOMAIN)
-    params["meetingEndedURL"] = str(url)
+    sig = cxt.bbb.sign_end_callback(str(meeting.uuid))
+    params["meetingEndedURL"] = cxt.callback_url(
+        "bbblb:callback_end", uuid=str(meeting.uuid), sig=sig
+    )
 
     # Remember and remove all variants of the recording-ready callbacks so we
     # can fire them later, after the recordings were imported and are actually
@@ -284,13 +321,9 @@ async def _intercept_callbacks(
             )
 
         if orig_url or param in always_intercept:
-            url = cxt.request.url_for(
-                "bbblb:callback_proxy",
-                uuid=meeting.uuid,
-                type=typename,
+            params[param] = cxt.callback_url(
+                "bbblb:callback_proxy", uuid=str(meeting.uuid), type=typename
             )
-            url = url.replace(scheme="https", hostname=cxt.config.DOMAIN)
-            params[param] = str(url)
 
     return callbacks
 
@@ -318,28 +351,30 @@ async def handle_create(ctx: BBBApiRequest):
     meeting_created = False
 
     if not meeting:
-        # Find best server for new meetings
-        stmt = model.Server.select_best(tenant).with_for_update()
-        server = (await ctx.session.execute(stmt)).scalar_one_or_none()
-        if not server:
-            raise make_error("internalError", "No suitable servers available.")
-
-        # Increase server load NOW (as fast as possible)
         try:
             size_hint = int(params.get("meta_bbb-meeting-size-hint", "0"))
         except ValueError:
             size_hint = 0
         load = ctx.services.get(MeetingPoller).get_meeting_load(size_hint=size_hint)
-        await ctx.session.execute(server.increment_load_stmt(load))
+
+        # Find best server for new meetings and increase its load NOW
+        server = await model.Server.reserve_best(ctx.session, tenant, load)
+        if not server:
+            raise make_error("internalError", "No suitable servers available.")
 
         # Try to create the meeting
         # Note: This commits the session as a side-effect
         meeting, meeting_created = await model.get_or_create(
             ctx.session,
             select_meeting,
-            lambda: model.Meeting(
-                uuid=uuid.uuid4(), external_id=unscoped_id, server=server, tenant=tenant
+            model.Meeting,
+            dict(
+                uuid=uuid.uuid4(),
+                external_id=unscoped_id,
+                server_fk=server.id,
+                tenant_fk=tenant.id,
             ),
+            conflict_cols=["external_id", "tenant_fk"],
         )
 
     # Apply tenant-specific create call overrides
@@ -413,7 +448,7 @@ async def handle_join(ctx: BBBApiRequest):
     meeting = await ctx.require_meeting()
     server = await meeting.awaitable_attrs.server
 
-    await ctx.session.execute(server.increment_load_stmt(ctx.config.LOAD_USER))
+    await server.increment_load(ctx.session, ctx.config.LOAD_USER)
     await ctx.session.commit()
 
     # Apply tenant-specific join call overrides
@@ -506,6 +541,11 @@ async def handle_insert_document(ctx: BBBApiRequest):
     return upstream
 
 
+_NOT_RUNNING_XML = lxml.etree.tostring(
+    XML.response(XML.returncode("SUCCESS"), XML.running("false"))
+)
+
+
 @api("isMeetingRunning")
 async def handle_is_meeting_running(ctx: BBBApiRequest):
     async with ctx.session:
@@ -518,12 +558,7 @@ async def handle_is_meeting_running(ctx: BBBApiRequest):
             meeting = await ctx.require_meeting()
         except BBBError:
             # Not an error
-            return BBBResponse(
-                XML.response(
-                    XML.returncode("SUCCESS"),
-                    XML.running("false"),
-                )
-            )
+            return Response(_NOT_RUNNING_XML, media_type=XML_MEDIA_TYPE)
 
         server = await meeting.awaitable_attrs.server
 
@@ -549,35 +584,37 @@ async def handle_get_meetings(ctx: BBBApiRequest):
             .join(model.Meeting)
             .distinct()
         )
-        servers = (await session.execute(stmt)).scalars()
+        servers = (await session.execute(stmt)).scalars().all()
 
     result_xml = typing.cast(Element, XML.response(XML.returncode("SUCCESS")))
     all_meetings = SubElement(result_xml, "meetings")
 
-    tasks: list[typing.Awaitable[BBBResponse]] = []
-
     async def fetch_meetings(server):
         async with ctx.bbb.connect(server.api_base, server.secret) as bbb:
             return await bbb.action("getMeetings", params)
 
-    for server in servers:
-        tasks.append(fetch_meetings(server))
-
-    for next_upstream in asyncio.as_completed(tasks):
-        upstream = await next_upstream
-        if not upstream.success:
-            return
-        for meeting_xml in upstream.xml.iterfind("meetings/meeting"):
-            if meeting_xml.findtext("metadata/bbblb-tenant") != tenant.name:
-                continue
-            scoped_id = meeting_xml.findtext("meetingID")
-            if not scoped_id:
-                continue
-            unscoped_id, scope = utils.split_scope(scoped_id)
-            if scope != tenant.name:
-                continue
-            xml_fix_meeting_id(meeting_xml, scoped_id, unscoped_id)
-            all_meetings.append(meeting_xml)
+    # Upstream concurrency is bounded by the shared connector of BBBHelper.
+    tasks = [asyncio.ensure_future(fetch_meetings(server)) for server in servers]
+    try:
+        for next_upstream in asyncio.as_completed(tasks):
+            upstream = await next_upstream
+            if not upstream.success:
+                return upstream
+            for meeting_xml in upstream.xml.iterfind("meetings/meeting"):
+                if meeting_xml.findtext("metadata/bbblb-tenant") != tenant.name:
+                    continue
+                scoped_id = meeting_xml.findtext("meetingID")
+                if not scoped_id:
+                    continue
+                unscoped_id, scope = utils.split_scope(scoped_id)
+                if scope != tenant.name:
+                    continue
+                xml_fix_meeting_id(meeting_xml, scoped_id, unscoped_id)
+                all_meetings.append(meeting_xml)
+    finally:
+        # Do not leave requests running if we return early or fail
+        for task in tasks:
+            task.cancel()
 
     return result_xml
 
@@ -610,6 +647,19 @@ async def handle_get_meeting_info(ctx: BBBApiRequest):
 ##
 
 
+# TODO: Check if a joined loader is faster, and maybe skip recordings with
+# no formats
+_SELECT_RECORDINGS = (
+    model.Recording.select()
+    .order_by(model.Recording.id)
+    .options(
+        sqlalchemy.orm.selectinload(model.Recording.formats).undefer(
+            model.PlaybackFormat.xml
+        )
+    )
+)
+
+
 @api("getRecordings", methods=["GET"])
 async def handle_get_recordings(ctx: BBBApiRequest):
     tenant = await ctx.require_tenant()
@@ -621,11 +671,7 @@ async def handle_get_recordings(ctx: BBBApiRequest):
     offset = await ctx.require_param("offset", -1, type=int)
     limit = await ctx.require_param("limit", -1, type=int)
 
-    stmt = model.Recording.select(tenant=tenant)
-    stmt = stmt.order_by(model.Recording.id)
-    # TODO: Check if a joined loader is faster, and maybe skip recordings with
-    # no formats
-    stmt = stmt.options(sqlalchemy.orm.selectinload(model.Recording.formats))
+    stmt = _SELECT_RECORDINGS.where(model.Recording.tenant_fk == tenant.id)
 
     meeting_ids = [m.strip() for m in meeting_ids.split(",") if m.strip()]
     if meeting_ids:
@@ -645,9 +691,13 @@ async def handle_get_recordings(ctx: BBBApiRequest):
         # Info: We only manage published|unpublished recordings, so 'any' is
         # practically the same as no state filter at all.
         stmt = stmt.where(model.Recording.state.in_(state[:5]))
-    if meta:
+    if meta and ctx.session.get_bind().dialect.name == "postgresql":
+        # A single containment check can use the GIN index on meta
+        jsonb_meta = sqlalchemy.type_coerce(model.Recording.meta, model.JSONB)
+        stmt = stmt.where(jsonb_meta.contains(meta))
+    elif meta:
         for key, value in meta.items():
-            stmt = stmt.where(model.Recording.meta[key].as_text() == value)
+            stmt = stmt.where(model.Recording.meta[key].as_string() == value)
     if 0 < offset < 10000:
         stmt = stmt.offset(offset)
     if 0 < limit < ctx.config.MAX_ITEMS:
@@ -658,22 +708,29 @@ async def handle_get_recordings(ctx: BBBApiRequest):
     result_xml: Element = XML.response(XML.returncode("SUCCESS"))
     all_recordings = SubElement(result_xml, "recordings")
 
-    for rec in (await ctx.session.execute(stmt)).scalars():
-        rec_xml: Element = XML.recording(
-            XML.recordID(rec.record_id),
-            XML.meetingID(rec.external_id),
-            XML.internalMeetingID(rec.record_id),  # TODO: Really always the case?
-            XML.name(rec.meta["meetingName"]),
-            XML.isBreakout(rec.meta.get("isBreakout", "false")),
-            XML.published(
-                "true" if rec.state == model.RecordingState.PUBLISHED else "false"
-            ),
-            XML.state(rec.state.value),
-            XML.startTime(str(int(rec.started.timestamp() * 1000))),
-            XML.endTime(str(int(rec.ended.timestamp() * 1000))),
-            XML.participants(str(rec.participants)),
-            XML.metadata(*[XML(key, value) for key, value in rec.meta.items()]),
+    # Fetch in batches, so formats are loaded and XML is built while the
+    # remaining rows are still arriving.
+    stmt = stmt.execution_options(yield_per=100)
+    async for rec in await ctx.session.stream_scalars(stmt):
+        # Build elements in place. Appending trees created by XML.*() to
+        # the response document is noticeably slower for long lists.
+        rec_xml = SubElement(all_recordings, "recording")
+        SubElement(rec_xml, "recordID").text = rec.record_id
+        SubElement(rec_xml, "meetingID").text = rec.external_id
+        # TODO: Really always the case?
+        SubElement(rec_xml, "internalMeetingID").text = rec.record_id
+        SubElement(rec_xml, "name").text = rec.meta["meetingName"]
+        SubElement(rec_xml, "isBreakout").text = rec.meta.get("isBreakout", "false")
+        SubElement(rec_xml, "published").text = (
+            "true" if rec.state == model.RecordingState.PUBLISHED else "false"
         )
+        SubElement(rec_xml, "state").text = rec.state.value
+        SubElement(rec_xml, "startTime").text = str(int(rec.started.timestamp() * 1000))
+        SubElement(rec_xml, "endTime").text = str(int(rec.ended.timestamp() * 1000))
+        SubElement(rec_xml, "participants").text = str(rec.participants)
+        meta_xml = SubElement(rec_xml, "metadata")
+        for key, value in rec.meta.items():
+            SubElement(meta_xml, key).text = value
 
         # TODO: Undocumented <breakout> section with junk in it, see actual BBB responses
         # TODO: Undocumented <rawSize> section
@@ -687,8 +744,6 @@ async def handle_get_recordings(ctx: BBBApiRequest):
             format_xml = playback_to_xml(ctx.config, playback)
             playback_xml.append(format_xml)
 
-        all_recordings.append(rec_xml)
-
     return result_xml
 
 
@@ -716,21 +771,31 @@ async def handle_publish_recordings(ctx: BBBApiRequest):
     if not recs:
         return make_error("notFound", "Unknown recording")
 
-    # Publish or unpublish recordings
-    for rec in recs:
-        try:
-            await asyncio.to_thread(action, tenant.name, rec.record_id)
-            # TODO: This is racy, but unlikely to cause issues. Improve?
-            await ctx.session.execute(
-                model.Recording.update(model.Recording.id == rec.id).values(
-                    state=new_state
-                )
-            )
-        except FileNotFoundError:
-            LOG.exception(
-                f"Recording {rec.record_id} found in database but not in storage!"
+    # Publish or unpublish recordings. The disk operations are independent,
+    # so run them concurrently in worker threads.
+    results = await asyncio.gather(
+        *[asyncio.to_thread(action, tenant.name, rec.record_id) for rec in recs],
+        return_exceptions=True,
+    )
+    changed_ids = []
+    for rec, result in zip(recs, results):
+        if isinstance(result, FileNotFoundError):
+            LOG.error(
+                f"Recording {rec.record_id} found in database but not in storage!",
+                exc_info=result,
             )
             continue
+        if isinstance(result, BaseException):
+            raise result
+        changed_ids.append(rec.id)
+
+    # TODO: This is racy, but unlikely to cause issues. Improve?
+    if changed_ids:
+        await ctx.session.execute(
+            model.Recording.update(model.Recording.id.in_(changed_ids)).values(
+                state=new_state
+            )
+        )
 
     # Persist changes (may be fewer than requested)
     await ctx.session.commit()
@@ -758,8 +823,16 @@ async def handle_delete_recordings(ctx: BBBApiRequest):
     # Do so in the background, as this may take some time.
     importer = await ctx.services.use(RecordingManager)
 
-    for record_id in record_ids:
-        asyncio.create_task(asyncio.to_thread(importer.delete, tenant.name, record_id))
+    def delete_all():
+        for record_id in record_ids:
+            try:
+                importer.delete(tenant.name, record_id)
+            except Exception:
+                LOG.exception(f"Failed to delete recording {record_id} from disk")
+
+    # A single worker thread per request, so large requests do not flood
+    # the thread pool.
+    asyncio.create_task(asyncio.to_thread(delete_all))
 
     return XML.response(
         XML.returncode("SUCCESS"),
@@ -787,12 +860,17 @@ async def handle_update_recordings(ctx: BBBApiRequest):
 
     updated = False
     for rec in recs:
+        # JSON columns do not track in-place changes, so assign a new dict.
+        # Only changed rows are flushed, batched into a single executemany.
+        new_meta = dict(rec.meta)
         for key, value in meta.items():
-            updated |= rec.meta.get(key) != value
             if value:
-                rec.meta[key] = value
+                new_meta[key] = value
             else:
-                rec.meta.pop(key, None)
+                new_meta.pop(key, None)
+        if new_meta != rec.meta:
+            rec.meta = new_meta
+            updated = True
 
     await ctx.session.commit()
 
@@ -1,14 +1,15 @@
 import asyncio
+from collections import OrderedDict
 import functools
-import hashlib
 import hmac
 import json
-from urllib.parse import parse_qs
+from urllib.parse import parse_qsl
 import logging
+import time
 import jwt
 
 from bbblb.services.analytics import AnalyticsHandler
-from bbblb.services.bbb import JWT_ALGORITHMS
+from bbblb.services.bbb import JWT_ALGORITHMS, jwt_decode
 from bbblb.web import bbbapi
 from bbblb import model, utils
 
@@ -18,6 +19,7 @@ from starlette.responses import Response, JSONResponse
 
 from bbblb.web import ApiRequestContext
 from bbblb.services.recording import RecordingManager
+from bbblb.services.servers import ServerCache
 
 LOG = logging.getLogger(__name__)
 
@@ -39,6 +41,11 @@ def api(route: str, methods=["GET", "POST"], name: str | None = None):
                 out = ApiError(
                     500, "Unhandled exception", "You found a bug!"
                 ).to_response()
+
+            if isinstance(out, dict):
+                out = JSONResponse(out, 200)
+            elif out is None:
+                out = Response(status_code=204)
             return out
 
         path = "/" + route
@@ -84,27 +91,63 @@ API_SCOPES = set(_API_SCOPES) | set(
 )
 
 
+#: Maximum number of verified tokens to remember
+TOKEN_CACHE_SIZE = 10_000
+#: Maximum number of seconds a verified token is remembered
+TOKEN_CACHE_TTL = 60
+
+_token_cache: OrderedDict[tuple[str, str, str], tuple[float, dict]] = OrderedDict()
+
+
+def _verified_decode(token: str, secret: str, audience: str) -> dict:
+    """Decode and verify a HS256 JWT, or return a copy of the claims of an
+    already verified token from cache.
+
+    The cache is keyed by token, secret and audience, so changing a
+    secret automatically invalidates all tokens signed with the old
+    secret. Entries are evicted after TOKEN_CACHE_TTL seconds or when
+    the token expires, whatever comes first."""
+    key = (token, secret, audience)
+    now = time.time()
+
+    cached = _token_cache.get(key)
+    if cached:
+        expire, claims = cached
+        if expire > now:
+            _token_cache.move_to_end(key)
+            return dict(claims)
+        del _token_cache[key]
+
+    claims = jwt.decode(token, secret, algorithms=["HS256"], audience=audience)
+
+    expire = now + TOKEN_CACHE_TTL
+    if isinstance(claims.get("exp"), (int, float)):
+        expire = min(expire, claims["exp"])
+    _token_cache[key] = (expire, claims)
+    while len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+
+    return dict(claims)
+
+
 class AuthContext:
     def __init__(
         self,
         claims,
-        server: model.Server | None = None,
+        server: str | None = None,
         tenant: model.Tenant | None = None,
     ):
         self.claims = claims
         self.server = server
         self.tenant = tenant
-
-    @functools.cached_property
-    def scopes(self):
-        return set(self.claims.get("scope", "").split())
+        self.scopes = frozenset(claims.get("scope", "").split())
 
     @property
     def sub(self):
         return self.claims["sub"]
 
     def has_scope(self, *scopes: str):
-        return any(scope in self.scopes for scope in scopes)
+        return not self.scopes.isdisjoint(scopes)
 
     def ensure_scope(self, *scopes: str):
         """Ensure that the token has one of the given scopes. Return the matching scope."""
@@ -136,19 +179,16 @@ class AuthContext:
             kid = header.get("kid")  # type: str|None
             if kid and kid.startswith("bbb:"):
                 # TODO: Disabled servers can still upload recordings. Correct?
-                server = await model.Server.find(ctx.session, domain=kid[4:])
-                if not server:
+                server = kid[4:]
+                server_cache = await ctx.services.use(ServerCache)
+                secret = await server_cache.get_secret(server)
+                if not secret:
                     raise ApiError(
                         401, "Access denied", "Unknown server in key identifier"
                     )
-                payload = jwt.decode(
-                    credentials,
-                    server.secret,
-                    algorithms=["HS256"],
-                    audience=ctx.config.DOMAIN,
-                )
+                payload = _verified_decode(credentials, secret, ctx.config.DOMAIN)
                 payload["scope"] = SERVER_SCOPE
-                payload["sub"] = server.domain
+                payload["sub"] = server
                 return AuthContext(payload, server=server)
             elif kid and kid.startswith("tenant:"):
                 tenant = await model.Tenant.find(
@@ -160,11 +200,8 @@ class AuthContext:
                         "Access denied",
                         "Unknown or disabled tenant in key identifier",
                     )
-                payload = jwt.decode(
-                    credentials,
-                    tenant.secret,
-                    algorithms=["HS256"],
-                    audience=ctx.config.DOMAIN,
+                payload = _verified_decode(
+                    credentials, tenant.secret, ctx.config.DOMAIN
                 )
                 payload["scope"] = TENANT_SCOPE
                 payload["sub"] = tenant.name
@@ -172,11 +209,8 @@ class AuthContext:
             elif kid:
                 raise ApiError(401, "Access denied", "Unknown key identifier type")
             else:
-                payload = jwt.decode(
-                    credentials,
-                    ctx.config.SECRET,
-                    algorithms=["HS256"],
-                    audience=ctx.config.DOMAIN,
+                payload = _verified_decode(
+                    credentials, ctx.config.SECRET, ctx.config.DOMAIN
                 )
                 return AuthContext(payload)
         except jwt.exceptions.InvalidAudienceError:
@@ -204,14 +238,16 @@ async def handle_callback_end(ctx: BBBLBApiRequest):
     try:
         meeting_uuid = ctx.request.path_params["uuid"]
         callback_sig = ctx.request.path_params["sig"]
+        # Signatures and compare_digest() only work with ASCII strings
+        if not (meeting_uuid.isascii() and callback_sig.isascii()):
+            raise ValueError("Non-ASCII callback parameters")
     except (KeyError, ValueError):
         LOG.warning("Callback called with missing or invalid parameters")
         return Response("Invalid callback URL", 400)
 
     # Verify callback signature
-    sig = f"bbblb:callback:end:{meeting_uuid}".encode("ASCII")
-    sig = hmac.digest(ctx.config.SECRET.encode("UTF8"), sig, hashlib.sha256)
-    if not hmac.compare_digest(sig, bytes.fromhex(callback_sig)):
+    sig = ctx.bbb.sign_end_callback(meeting_uuid)
+    if not hmac.compare_digest(sig, callback_sig.lower()):
         LOG.warning("Callback signature mismatch")
         return Response("Access denied, signature check failed", 401)
 
@@ -256,12 +292,22 @@ async def handle_callback_proxy(ctx: BBBLBApiRequest):
     origin = callbacks[0].server
 
     async def read_body():
-        body = bytearray()
+        # Fail early if the client announces a body that is too large, then
+        # collect chunks and join them once instead of growing a buffer.
+        max_body = ctx.config.MAX_BODY
+        try:
+            length = int(ctx.request.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ApiError(400, "BadRequest", "Invalid Content-Length header")
+        if length > max_body:
+            raise ApiError(413, "BadRequest", "Request body too large")
+        chunks, size = [], 0
         async for chunk in ctx.request.stream():
-            body.extend(chunk)
-            if len(body) > ctx.config.MAX_BODY:
+            size += len(chunk)
+            if size > max_body:
                 raise ApiError(413, "BadRequest", "Request body too large")
-        return body
+            chunks.append(chunk)
+        return b"".join(chunks)
 
     # BBB knows two different types of JWT enhanced callbacks:
     # analytics: Minimal JWT in Authorization (beare) header, unsigned payload.
@@ -301,21 +347,20 @@ async def handle_callback_proxy(ctx: BBBLBApiRequest):
             asyncio.create_task(analytics.store(callbacks[0].tenant, payload))
 
         # Forward callbacks to front-ends
-        for callback in callbacks:
-            asyncio.create_task(ctx.bbb.fire_analytics_callback(callback, payload))
+        asyncio.create_task(ctx.bbb.fire_analytics_callbacks(callbacks, payload))
 
     elif ctype == "application/x-www-form-urlencoded":
         body = await read_body()
 
         try:
-            signed_parameters = parse_qs(body.decode("UTF-8"))["signed_parameters"][0]
+            # Only one field is needed, no need to build a dict of lists
+            pairs = parse_qsl(body.decode("UTF-8"))
+            signed_parameters = next(v for k, v in pairs if k == "signed_parameters")
         except BaseException:
             raise ApiError(400, "BadRequest", "Invalid form data")
 
         try:
-            payload = jwt.decode(
-                signed_parameters, origin.secret, algorithms=JWT_ALGORITHMS
-            )
+            payload = await jwt_decode(signed_parameters, origin.secret)
             assert isinstance(payload, dict)
         except BaseException:
             raise ApiError(401, "AccessDenied", "Invalid JWT")
@@ -325,8 +370,7 @@ async def handle_callback_proxy(ctx: BBBLBApiRequest):
             payload["meeting_id"] = utils.remove_scope(payload["meeting_id"])
 
         # Forward callbacks to front-ends
-        for callback in callbacks:
-            asyncio.create_task(ctx.bbb.fire_signed_callback(callback, payload))
+        asyncio.create_task(ctx.bbb.fire_signed_callbacks(callbacks, payload))
 
     else:
         raise ApiError(400, "BadRequest", "Unknown callback format")
@@ -346,8 +390,9 @@ async def handle_recording_upload(ctx: BBBLBApiRequest):
     auth = await ctx.auth()
     auth.ensure_scope("rec:upload", SERVER_SCOPE)
 
-    ctype = ctx.request.headers.get("content-type")
-    if ctype != "application/x-tar":
+    # Ignore media type parameters (e.g. charset)
+    ctype = ctx.request.headers.get("content-type", "")
+    if ctype.partition(";")[0].strip().lower() != "application/x-tar":
         return JSONResponse(
             {
                 "error": "Unsupported Media Type",
@@ -468,6 +513,8 @@ async def handle_server_post(ctx: BBBLBApiRequest):
 
         ctx.session.add(server)
 
+    (await ctx.services.use(ServerCache)).invalidate()
+
 
 async def handle_server_switch(ctx: BBBLBApiRequest, enable: bool):
     auth = await ctx.auth()
@@ -482,11 +529,11 @@ async def handle_server_switch(ctx: BBBLBApiRequest, enable: bool):
         server.enabled = enable
 
 
-@api("v1/server/{name}/enable", methods=["POST"])
+@api("v1/server/{domain}/enable", methods=["POST"])
 async def handle_server_enable(ctx: BBBLBApiRequest, enable=True):
     return await handle_server_switch(ctx, True)
 
 
-@api("v1/server/{name}/disable", methods=["POST"])
+@api("v1/server/{domain}/disable", methods=["POST"])
 async def handle_server_disable(ctx: BBBLBApiRequest):
     return await handle_server_switch(ctx, False)
@@ -48,3 +48,5 @@ autodoc_preserve_defaults = True
 intersphinx_mapping = {
     "python": ("https://docs.python.org/3/", None),
 }
+# Reuse downloaded inventories for incremental builds (default: 5 days)
+intersphinx_cache_limit = 90
@@ -87,3 +87,92 @@ async def test_parameter(mock_request: MagicMock, orm: model.AsyncSession):
     async with bbblb.web.bbbapi.BBBApiRequest(mock_request) as ctx:
         result = await ctx.require_param("meetingID")
     assert result == "1234"
+
+
+async def test_read_body_too_large(mock_request: MagicMock, config):
+    # Bodies announced as too large are rejected before reading them
+    size = str(config.MAX_BODY + 1)
+    mock_request.headers.get.side_effect = {"Content-Length": size}.get
+    async with bbblb.web.bbbapi.BBBApiRequest(mock_request) as ctx:
+        with pytest.raises(bbblb.web.bbbapi.BBBError) as exc:
+            await ctx.read_body()
+    assert exc.value.status_code == 413
+    mock_request.stream.assert_not_called()
+
+
+def test_get_recordings(db, client: TestClient):
+    async def insert_recording():
+        async with db.begin() as tx:
+            tenant = model.Tenant(name="foo", realm="foo.local", secret="correct")
+            record = model.Recording(
+                record_id="rec-1",
+                external_id="meeting-1",
+                state=model.RecordingState.PUBLISHED,
+                started=model.utcnow(),
+                ended=model.utcnow(),
+                meta={"meetingName": "Test"},
+                tenant=tenant,
+            )
+            xml = "<playback><format>presentation</format><link>/x</link></playback>"
+            tx.session.add(
+                model.PlaybackFormat(recording=record, format="test", xml=xml)
+            )
+
+    client.portal.call(insert_recording)  # type: ignore
+
+    def get_recordings(**params):
+        query = sign_query("getRecordings", params, secret="correct")
+        response = client.get(
+            f"/bigbluebutton/api/getRecordings?{query}", headers={"Host": "foo.local"}
+        )
+        xml = lxml.etree.fromstring(response.content)
+        assert xml.findtext("returncode") == "SUCCESS", response.text
+        return xml
+
+    xml = get_recordings()
+    assert xml.findtext("recordings/recording/recordID") == "rec-1"
+    assert xml.findtext("recordings/recording/playback/format/type") == "test"
+
+    xml = get_recordings(meta_meetingName="Test")
+    assert xml.findtext("recordings/recording/recordID") == "rec-1"
+    xml = get_recordings(meta_meetingName="Other")
+    assert xml.find("recordings/recording") is None
+
+
+def test_update_recordings(db, client: TestClient):
+    async def insert_recording():
+        async with db.begin() as tx:
+            tenant = model.Tenant(name="foo", realm="foo.local", secret="correct")
+            tx.session.add(
+                model.Recording(
+                    record_id="rec-1",
+                    external_id="meeting-1",
+                    state=model.RecordingState.PUBLISHED,
+                    started=model.utcnow(),
+                    ended=model.utcnow(),
+                    meta={"meetingName": "Test", "drop": "me"},
+                    tenant=tenant,
+                )
+            )
+
+    async def load_meta():
+        async with db.session() as session:
+            stmt = model.Recording.select(record_id="rec-1")
+            return (await session.execute(stmt)).scalar_one().meta
+
+    client.portal.call(insert_recording)  # type: ignore
+
+    def update_recordings(**params):
+        query = sign_query("updateRecordings", params, secret="correct")
+        response = client.get(
+            f"/bigbluebutton/api/updateRecordings?{query}",
+            headers={"Host": "foo.local"},
+        )
+        xml = lxml.etree.fromstring(response.content)
+        assert xml.findtext("returncode") == "SUCCESS", response.text
+        return xml.findtext("updated")
+
+    assert update_recordings(recordID="rec-1", meta_new="value", meta_drop="") == "true"
+    meta = client.portal.call(load_meta)  # type: ignore
+    assert meta == {"meetingName": "Test", "new": "value"}
+    assert update_recordings(recordID="rec-1", meta_new="value") == "false"
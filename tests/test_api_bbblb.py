@@ -0,0 +1,126 @@
+import time
+
+import jwt
+import pytest
+from conftest import TestClient
+
+from bbblb.services.db import DBContext
+from bbblb.web import bbblbapi
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    bbblbapi._token_cache.clear()
+    yield
+    bbblbapi._token_cache.clear()
+
+
+def test_verified_decode_cache():
+    token = jwt.encode({"sub": "test", "aud": "localhost"}, "secret")
+
+    claims = bbblbapi._verified_decode(token, "secret", "localhost")
+    assert claims["sub"] == "test"
+    assert (token, "secret", "localhost") in bbblbapi._token_cache
+
+    # Cached claims are copies and cannot be modified by callers
+    claims["scope"] = "admin"
+    claims = bbblbapi._verified_decode(token, "secret", "localhost")
+    assert "scope" not in claims
+
+    # A different secret or audience must not hit the cache
+    with pytest.raises(jwt.exceptions.InvalidSignatureError):
+        bbblbapi._verified_decode(token, "wrong", "localhost")
+    with pytest.raises(jwt.exceptions.InvalidAudienceError):
+        bbblbapi._verified_decode(token, "secret", "example.com")
+
+
+def test_verified_decode_expired():
+    token = jwt.encode(
+        {"sub": "test", "aud": "localhost", "exp": int(time.time()) + 60}, "secret"
+    )
+    bbblbapi._verified_decode(token, "secret", "localhost")
+
+    # Pretend the cached token expired in the meantime
+    key = (token, "secret", "localhost")
+    bbblbapi._token_cache[key] = (time.time() - 1, bbblbapi._token_cache[key][1])
+    bbblbapi._verified_decode(token, "secret", "localhost")
+    assert bbblbapi._token_cache[key][0] > time.time()
+
+
+def test_auth_scopes():
+    auth = bbblbapi.AuthContext({"sub": "test", "scope": "rec tenant:list"})
+    assert auth.scopes == {"rec", "tenant:list"}
+    assert auth.has_scope("tenant:list", "server:list")
+    assert not auth.has_scope("server", "server:list")
+    assert auth.ensure_scope("rec:upload") == "rec:upload"
+    assert auth.ensure_scope("tenant:list") == "tenant:list"
+    with pytest.raises(bbblbapi.ApiError):
+        auth.ensure_scope("tenant:create")
+    assert bbblbapi.AuthContext({"scope": "admin"}).ensure_scope("foo") == "admin"
+
+
+def test_tenant_api(db, client: TestClient):
+    services = client.app.state.services  # type: ignore
+    client.portal.call(services.use, DBContext)  # type: ignore
+
+    token = jwt.encode({"sub": "test", "aud": "localhost", "scope": "tenant"}, "1234")
+    headers = {"Authorization": f"bearer {token}"}
+
+    response = client.post(
+        "/bbblb/api/v1/tenant/foo",
+        json={"realm": "foo.example.com", "secret": "s3cr3t"},
+        headers=headers,
+    )
+    assert response.status_code == 204
+
+    response = client.get("/bbblb/api/v1/tenant", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "tenants": [{"name": "foo", "realm": "foo.example.com", "secret": "s3cr3t"}]
+    }
+
+    response = client.get("/bbblb/api/v1/tenant")
+    assert response.status_code == 403
+    assert response.json()["error"] == "Authentication required"
+
+
+def test_server_api(db, client: TestClient):
+    services = client.app.state.services  # type: ignore
+    client.portal.call(services.use, DBContext)  # type: ignore
+
+    token = jwt.encode({"sub": "test", "aud": "localhost", "scope": "server"}, "1234")
+    headers = {"Authorization": f"bearer {token}"}
+    response = client.post(
+        "/bbblb/api/v1/server/bbb.example.com",
+        json={"secret": "s3cr3t"},
+        headers=headers,
+    )
+    assert response.status_code == 204
+    response = client.post(
+        "/bbblb/api/v1/server/bbb.example.com/disable", headers=headers
+    )
+    assert response.status_code == 204
+
+    # Server-signed tokens are verified against the (cached) server secret
+    def upload(domain, secret):
+        token = jwt.encode(
+            {"aud": "localhost"}, secret, headers={"kid": f"bbb:{domain}"}
+        )
+        return client.post(
+            "/bbblb/api/v1/recording/upload",
+            headers={"Authorization": f"bearer {token}", "Content-Type": "text/plain"},
+        )
+
+    assert upload("bbb.example.com", "s3cr3t").status_code == 415
+    assert upload("bbb.example.com", "wrong").status_code == 401
+    assert upload("unknown.example.com", "s3cr3t").status_code == 401
+
+    # Changing the secret takes effect immediately
+    response = client.post(
+        "/bbblb/api/v1/server/bbb.example.com",
+        json={"secret": "n3w-s3cr3t"},
+        headers=headers,
+    )
+    assert response.status_code == 204
+    assert upload("bbb.example.com", "s3cr3t").status_code == 401
+    assert upload("bbb.example.com", "n3w-s3cr3t").status_code == 415
@@ -1,7 +1,15 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
 import click
 from click.testing import CliRunner
 import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import AsyncSession
+from bbblb import model
 from bbblb.cli import main
+from bbblb.services.bbb import BBBHelper
 from bbblb.settings import BBBLBConfig
 
 
@@ -15,11 +23,185 @@ def runner(config: BBBLBConfig):
     )
 
 
-def test_cli_server(runner: CliRunner):
-    result = runner.invoke(
-        main, ["server", "create", "--secret", "1234", "test.example.com"]
+async def test_cli_server(runner: CliRunner, orm: AsyncSession):
+    result = await asyncio.to_thread(
+        runner.invoke,
+        main,
+        ["server", "create", "--secret", "1234", "test.example.com"],
     )
     assert result.exit_code == 0
-    result = runner.invoke(main, ["server", "list", "--table-format=raw"])
+    result = await asyncio.to_thread(
+        runner.invoke, main, ["server", "list", "--table-format=raw"]
+    )
     assert result.exit_code == 0
     assert result.stdout == "test.example.com\t1234\n"
+
+
+async def test_cli_recording_remove_orphans(runner: CliRunner, orm: AsyncSession):
+    tenant = model.Tenant(name="test", realm="test.example.com", secret="1234")
+    for i in range(3):
+        record = model.Recording(
+            record_id=f"{i}abc-123",
+            external_id="meeting",
+            state=model.RecordingState.PUBLISHED,
+            started=datetime.now(),
+            ended=datetime.now(),
+            tenant=tenant,
+        )
+        orm.add(model.PlaybackFormat(recording=record, format="presentation", xml=""))
+    orm.add(tenant)
+    await orm.commit()
+
+    result = await asyncio.to_thread(runner.invoke, main, ["recording", "list"])
+    assert result.exit_code == 0
+    assert len(result.stdout.splitlines()) == 3
+
+    result = await asyncio.to_thread(
+        runner.invoke, main, ["recording", "remove-orphans", "--dry-run"]
+    )
+    assert result.exit_code == 0
+    assert len((await orm.execute(model.Recording.select())).all()) == 3
+
+    result = await asyncio.to_thread(
+        runner.invoke, main, ["recording", "remove-orphans"]
+    )
+    assert result.exit_code == 0
+    assert not (await orm.execute(model.Recording.select())).all()
+    assert not (await orm.execute(model.PlaybackFormat.select())).all()
+
+
+async def test_cli_override_from_file(runner: CliRunner, orm: AsyncSession):
+    orm.add(model.Tenant(name="test", realm="test.example.com", secret="1234"))
+    await orm.commit()
+
+    lines = "# Comment\nduration<60\n\nwebcamsOnlyForModerator=true\nduration<30\n"
+    result = await asyncio.to_thread(
+        runner.invoke,
+        main,
+        ["override", "set", "--from-file", "-", "test", "create", "record=false"],
+        input=lines,
+    )
+    assert result.exit_code == 0, result.output
+
+    result = await asyncio.to_thread(runner.invoke, main, ["override", "list", "test"])
+    assert result.exit_code == 0, result.output
+    assert sorted(result.stdout.splitlines()) == [
+        "test create duration<30",
+        "test create record=false",
+        "test create webcamsOnlyForModerator=true",
+    ]
+
+
+async def test_cli_state_import(runner: CliRunner, orm: AsyncSession):
+    tenant = model.Tenant(name="old", realm="old.example.com", secret="1234")
+    busy = model.Server(domain="busy.example.com", secret="1234")
+    idle = model.Server(domain="idle.example.com", secret="1234")
+    meeting = model.Meeting(
+        tenant=tenant, server=busy, uuid=uuid.uuid4(), external_id="foo"
+    )
+    orm.add_all([tenant, busy, idle, meeting])
+    await orm.commit()
+
+    state = {
+        "v": 1,
+        "servers": {"new.example.com": {"secret": "1234"}},
+        "tenants": {"new": {"secret": "5678", "realm": "new.example.com"}},
+    }
+    result = await asyncio.to_thread(
+        runner.invoke, main, ["state", "import", "--delete"], input=json.dumps(state)
+    )
+    assert result.exit_code == 0, result.output
+
+    # Servers with meetings are disabled, idle servers are removed
+    orm.expire_all()
+    servers = (await orm.execute(model.Server.select())).scalars().all()
+    assert {s.domain: s.enabled for s in servers} == {
+        "busy.example.com": False,
+        "new.example.com": True,
+    }
+    tenants = (await orm.execute(model.Tenant.select())).scalars().all()
+    assert {t.name: t.enabled for t in tenants} == {"old": False, "new": True}
+
+
+async def test_cli_state_import_nuke(
+    runner: CliRunner, orm: AsyncSession, mocker: MockerFixture
+):
+    connect = mocker.patch.object(BBBHelper, "connect")
+    connect.return_value.action = mocker.AsyncMock()
+
+    tenant = model.Tenant(name="test", realm="test.example.com", secret="1234")
+    server = model.Server(domain="old.example.com", secret="1234")
+    for i in range(3):
+        orm.add(
+            model.Meeting(
+                tenant=tenant, server=server, uuid=uuid.uuid4(), external_id=f"m{i}"
+            )
+        )
+    await orm.commit()
+
+    state = {"v": 1, "servers": {}}
+    result = await asyncio.to_thread(
+        runner.invoke,
+        main,
+        ["state", "import", "--delete", "--nuke", "-i", "servers"],
+        input=json.dumps(state),
+    )
+    assert result.exit_code == 0, result.output
+    assert connect.call_count == 3
+    assert sorted(
+        call.args[1]["meetingID"]
+        for call in connect.return_value.action.await_args_list
+    ) == ["m0-bbblb-test", "m1-bbblb-test", "m2-bbblb-test"]
+
+    orm.expire_all()
+    assert not (await orm.execute(model.Server.select())).all()
+    assert not (await orm.execute(model.Meeting.select())).all()
+
+
+async def test_cli_state_export(runner: CliRunner, orm: AsyncSession):
+    tenant = model.Tenant(name="test", realm="test.example.com", secret="1234")
+    tenant.overrides.append(
+        model.TenantOverride(type="create", param="record", op="=", value="false")
+    )
+    orm.add_all([tenant, model.Server(domain="bbb.example.com", secret="5678")])
+    await orm.commit()
+
+    result = await asyncio.to_thread(runner.invoke, main, ["state", "export"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout) == {
+        "v": 1,
+        "servers": {"bbb.example.com": {"secret": "5678", "enabled": True}},
+        "tenants": {
+            "test": {
+                "secret": "1234",
+                "realm": "test.example.com",
+                "enabled": True,
+                "overrides": {"join": {}, "create": {"record": "=false"}},
+            }
+        },
+    }
+
+
+async def test_cli_state_import_invalid(runner: CliRunner, orm: AsyncSession):
+    orm.add(model.Server(domain="bbb.example.com", secret="1234"))
+    await orm.commit()
+
+    state = {
+        "v": 1,
+        "servers": {"bbb.example.com": {"enabled": "yes"}},
+        "tenants": {"test": {"secret": "1234", "overrides": {"create": {"a": ""}}}},
+    }
+    result = await asyncio.to_thread(
+        runner.invoke, main, ["state", "import"], input=json.dumps(state)
+    )
+    assert result.exit_code == 1
+    assert result.stdout.splitlines() == [
+        "Invalid state: servers.bbb.example.com.secret: Missing or not a str",
+        "Invalid state: servers.bbb.example.com.enabled: Not a bool",
+        "Invalid state: tenants.test.realm: Missing or not a str",
+        "Invalid state: tenants.test.overrides.create.a: Must be a non-empty string",
+    ]
+
+    orm.expire_all()
+    server = (await orm.execute(model.Server.select())).scalar_one()
+    assert server.secret == "1234" and server.enabled
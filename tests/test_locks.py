@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bbblb import model
+from bbblb.services import ServiceRegistry
+from bbblb.services.db import DBContext
+from bbblb.services.locks import PROCESS_IDENTITY, LockManager
+
+
+async def test_lock_lifecycle(db: DBContext, services: ServiceRegistry):
+    locks = await services.use(LockManager)
+    lock = locks.create("test", timedelta(minutes=1))
+
+    assert await lock.try_acquire()
+    assert not await lock.try_acquire()
+    assert await lock.check()
+    assert await lock.try_release()
+    assert not await lock.try_release()
+    assert not await lock.check()
+
+
+async def test_lock_expired(orm: AsyncSession, services: ServiceRegistry):
+    locks = await services.use(LockManager)
+    lock = locks.create("test", timedelta(minutes=1))
+
+    # Locks held by other processes are only taken over once expired
+    stale = model.Lock(name="test", owner="other", ts=model.utcnow())
+    orm.add(stale)
+    await orm.commit()
+    assert not await lock.try_acquire()
+
+    stale.ts = model.utcnow() - timedelta(minutes=2)
+    await orm.commit()
+    assert await lock.try_acquire()
+
+    orm.expire_all()
+    lock_row = (await orm.execute(model.Lock.select(name="test"))).scalar_one()
+    assert lock_row.owner == PROCESS_IDENTITY
@@ -1,26 +1,40 @@
+import hashlib
+import hmac
 import uuid
+import jwt
+import pytest
+import pytest_asyncio
 from bbblb import model
 from datetime import timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bbblb.services import ServiceRegistry
-from bbblb.services.bbb import BBBHelper
+from bbblb.services.bbb import JWT_THREAD_THRESHOLD, BBBHelper, jwt_decode
 
 
-async def test_cleanup_stale_meetings(orm: AsyncSession, services: ServiceRegistry):
+@pytest_asyncio.fixture(scope="function")
+async def helper(services: ServiceRegistry):
     helper = await services.use(BBBHelper)
+    # Stop the periodic cleanup task, so it does not race with the tests
+    helper.task.cancel()  # type: ignore
+    await helper.shutdown_complete.wait()
+    yield helper
+
+
+async def test_cleanup_stale_meetings(orm: AsyncSession, helper: BBBHelper):
+    now = model.utcnow()
 
     t1 = model.Tenant(name="test", realm="bbb.example.com", secret="test")
     s1 = model.Server(domain="bbb1.example.com", secret="test")
     m1 = model.Meeting(
-        created=model.utcnow() - timedelta(minutes=4),
+        created=now - timedelta(minutes=4),
         tenant=t1,
         server=s1,
         uuid=uuid.uuid4(),
         external_id="foo",
     )
     m2 = model.Meeting(
-        created=model.utcnow() - timedelta(minutes=6),
+        created=now - timedelta(minutes=6),
         tenant=t1,
         server=s1,
         uuid=uuid.uuid4(),
@@ -29,25 +43,25 @@ async def test_cleanup_stale_meetings(orm: AsyncSession, services: ServiceRegist
     orm.add_all([t1, s1, m1, m2])
     await orm.commit()
 
-    await helper._cleanup_stale_meetings(timedelta(minutes=5))
-    assert [m1] == (await orm.execute(model.Meeting.select())).scalars().all()
+    assert 1 == await helper._cleanup_stale_meetings(timedelta(minutes=5))
+    assert [m1.id] == (await orm.scalars(model.select(model.Meeting.id))).all()
 
 
-async def test_cleanup_callbacks(orm: AsyncSession, services: ServiceRegistry):
-    helper = await services.use(BBBHelper)
+async def test_cleanup_callbacks(orm: AsyncSession, helper: BBBHelper):
+    now = model.utcnow()
 
     t1 = model.Tenant(name="test", realm="bbb.example.com", secret="test")
     s1 = model.Server(domain="bbb1.example.com", secret="test")
 
     c1 = model.Callback(
-        created=model.utcnow() - timedelta(days=44),
+        created=now - timedelta(days=44),
         tenant=t1,
         server=s1,
         uuid=uuid.uuid4(),
         type=model.CALLBACK_TYPE_REC,
     )
     c2 = model.Callback(
-        created=model.utcnow() - timedelta(days=46),
+        created=now - timedelta(days=46),
         tenant=t1,
         server=s1,
         uuid=uuid.uuid4(),
@@ -57,4 +71,26 @@ async def test_cleanup_callbacks(orm: AsyncSession, services: ServiceRegistry):
     await orm.commit()
 
     assert 1 == await helper._cleanup_old_callbacks(timedelta(days=45))
-    assert [c1] == (await orm.execute(model.Callback.select())).scalars().all()
+    assert [c1.id] == (await orm.scalars(model.select(model.Callback.id))).all()
+
+
+async def test_sign_end_callback(helper: BBBHelper):
+    expected = hmac.digest(
+        helper.config.SECRET.encode("UTF8"),
+        b"bbblb:callback:end:1234",
+        hashlib.sha256,
+    ).hex()
+    assert helper.sign_end_callback("1234") == expected
+    assert helper.sign_end_callback("1234") == expected
+    assert helper.sign_end_callback("4321") != expected
+
+
+async def test_jwt_decode():
+    small = {"meeting_id": "1234"}
+    large = {"meeting_id": "1234", "data": "x" * JWT_THREAD_THRESHOLD}
+    key = "s" * 32
+    for payload in (small, large):
+        token = jwt.encode(payload, key, "HS256")
+        assert await jwt_decode(token, key) == payload
+        with pytest.raises(jwt.exceptions.InvalidSignatureError):
+            await jwt_decode(token, "x" * 32)
@@ -1,5 +1,6 @@
 from bbblb import model
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
 from datetime import datetime
 
@@ -29,3 +30,52 @@ async def test_recording_delete(orm: AsyncSession):
 
     assert not (await orm.execute(model.PlaybackFormat.select())).all()
     assert not (await orm.execute(model.Recording.select())).all()
+
+
+async def test_get_or_create(orm: AsyncSession):
+    await insert_testdata(orm)
+    record = await model.Recording.get(orm, record_id="123")
+
+    def get_or_create(format: str):
+        return model.get_or_create(
+            orm,
+            model.PlaybackFormat.select(recording=record, format=format).options(
+                undefer(model.PlaybackFormat.xml)
+            ),
+            model.PlaybackFormat,
+            dict(recording_fk=record.id, format=format, xml="<new/>"),
+            conflict_cols=["recording_fk", "format"],
+        )
+
+    playback, created = await get_or_create("presentation")
+    assert not created and playback.xml == ""
+
+    playback, created = await get_or_create("video")
+    assert created and playback.xml == "<new/>"
+
+
+async def test_server_reserve_best(orm: AsyncSession):
+    available = model.ServerHealth.AVAILABLE
+    orm.add(model.Server(domain="a.example.com", secret="a", health=available))
+    orm.add(
+        model.Server(domain="b.example.com", secret="b", health=available, load=0.5)
+    )
+    orm.add(model.Server(domain="c.example.com", secret="c", enabled=False))
+    await orm.commit()
+
+    picked = []
+    for load in (1.0, 1.5, 1.0):
+        server = await model.Server.reserve_best(orm, None, load)
+        assert server
+        picked.append((server.domain, server.load))
+    await orm.commit()
+
+    assert picked == [
+        ("a.example.com", 1.0),
+        ("b.example.com", 2.0),
+        ("a.example.com", 2.0),
+    ]
+
+
+async def test_server_reserve_none(orm: AsyncSession):
+    assert await model.Server.reserve_best(orm, None, 1.0) is None
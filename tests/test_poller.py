@@ -1,8 +1,15 @@
-import bbblb.model
+import uuid
+
+import lxml.etree
+from pytest_mock import MockerFixture
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+import bbblb.model
+from bbblb.lib.bbb import BBBResponse
 from bbblb.services import ServiceRegistry
-from bbblb.services.poller import MeetingPoller
+from bbblb.services.bbb import BBBHelper
+from bbblb.services.poller import _SELECT_SERVERS, MeetingPoller
 
 
 async def test_update_load(
@@ -19,7 +26,17 @@ async def test_update_load(
     await orm.reset()
 
     # Poll this server
-    await poller.poll_one(bbb_server.id)
+    server = (
+        await orm.execute(
+            bbblb.model.Server.select(id=bbb_server.id).options(
+                selectinload(bbblb.model.Server.meetings)
+            )
+        )
+    ).scalar_one()
+    result = await poller.poll_one(server)
+    assert result
+    await poller.store_results([result])
+    orm.expunge_all()
 
     # Assume a different load value after polling
     server = (
@@ -27,3 +44,65 @@ async def test_update_load(
     ).scalar_one()
     assert server.health == bbblb.model.ServerHealth.AVAILABLE
     assert server.load != 1337.42
+
+
+async def test_poll_one(
+    orm: AsyncSession, services: ServiceRegistry, mocker: MockerFixture
+):
+    tenant = bbblb.model.Tenant(name="test", realm="test.example.com", secret="1234")
+    server = bbblb.model.Server(domain="bbb.example.com", secret="1234")
+    for i in range(2):
+        orm.add(
+            bbblb.model.Meeting(
+                tenant=tenant,
+                server=server,
+                uuid=uuid.uuid4(),
+                external_id=f"m{i}",
+                internal_id=f"internal-{i}",
+            )
+        )
+    await orm.commit()
+
+    # Only the first meeting is still running
+    meetings = lxml.etree.fromstring(
+        "<response><returncode>SUCCESS</returncode><meetings><meeting>"
+        "<internalMeetingID>internal-0</internalMeetingID>"
+        "<participantCount>5</participantCount>"
+        "</meeting></meetings></response>"
+    )
+    connect = mocker.patch.object(BBBHelper, "connect")
+    client = connect.return_value.__aenter__.return_value
+    client.action = mocker.AsyncMock(return_value=BBBResponse(meetings))
+
+    poller = await services.use(MeetingPoller)
+    poller.task.cancel()  # type: ignore
+
+    server = (await orm.execute(_SELECT_SERVERS)).scalar_one()
+    orm.expunge_all()
+    result = await poller.poll_one(server)
+    assert result and result.success and len(result.forget_ids) == 1
+    await poller.store_results([result])
+
+    stmt = bbblb.model.Server.select().options(
+        selectinload(bbblb.model.Server.meetings)
+    )
+    server = (await orm.execute(stmt)).scalar_one()
+    assert server.stats["users"] == 5
+    assert server.load > 0
+    assert server.recover == 1
+    assert [m.external_id for m in server.meetings] == ["m0"]
+
+
+async def test_poll_disabled(orm: AsyncSession, services: ServiceRegistry):
+    orm.add(bbblb.model.Server(domain="bbb.example.com", secret="1234", enabled=False))
+    await orm.commit()
+
+    poller = await services.use(MeetingPoller)
+    poller.task.cancel()  # type: ignore
+
+    # Disabled servers without meetings are not polled at all
+    stmt = bbblb.model.Server.select().options(
+        selectinload(bbblb.model.Server.meetings)
+    )
+    server = (await orm.execute(stmt)).scalar_one()
+    assert await poller.poll_one(server) is None